@@ -0,0 +1,21 @@
+-- ========================================================
+-- Adicionar chave de acesso da NF-e nas compras
+-- ========================================================
+-- Impede que a mesma NF-e seja importada duas vezes: o app confere a chave
+-- antes de inserir e o índice único garante isso no banco.
+-- Depois deste arquivo, execute novamente criar_funcao_inserir_compra_completa.sql
+-- ========================================================
+
+-- Adicionar coluna chave_acesso (44 dígitos) na tabela de compras
+ALTER TABLE singelo_compras 
+ADD COLUMN IF NOT EXISTS chave_acesso VARCHAR(44);
+
+-- Uma compra por chave (compras manuais e de cupom escaneado ficam sem chave)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_singelo_compras_chave_acesso
+ON singelo_compras(chave_acesso)
+WHERE chave_acesso IS NOT NULL;
+
+COMMENT ON COLUMN singelo_compras.chave_acesso IS 'Chave de acesso da NF-e/NFC-e importada (44 dígitos)';
+
+-- Verificar
+SELECT 'Campo chave_acesso adicionado com sucesso!' as status;
@@ -0,0 +1,28 @@
+-- ========================================================
+-- Adicionar chave de idempotência em vendas, entregas e compras
+-- ========================================================
+-- Vendas, custos de entrega e custos automáticos das box (compras) passam
+-- por uma fila local (outbox.py) antes de chegar ao Supabase. Cada lançamento leva um UUID: se o envio for repetido
+-- depois de uma falha de conexão, o lançamento não é gravado duas vezes.
+-- ========================================================
+
+-- Vendas
+ALTER TABLE singelo_vendas 
+ADD COLUMN IF NOT EXISTS chave_idempotencia UUID UNIQUE;
+
+COMMENT ON COLUMN singelo_vendas.chave_idempotencia IS 'Identificador do lançamento na fila local (evita duplicar reenvios)';
+
+-- Entregas
+ALTER TABLE singelo_entregas 
+ADD COLUMN IF NOT EXISTS chave_idempotencia UUID UNIQUE;
+
+COMMENT ON COLUMN singelo_entregas.chave_idempotencia IS 'Identificador do lançamento na fila local (evita duplicar reenvios)';
+
+-- Compras (custos automáticos das box)
+ALTER TABLE singelo_compras 
+ADD COLUMN IF NOT EXISTS chave_idempotencia UUID UNIQUE;
+
+COMMENT ON COLUMN singelo_compras.chave_idempotencia IS 'Identificador do lançamento na fila local (evita duplicar reenvios)';
+
+-- Verificar
+SELECT 'Campo chave_idempotencia adicionado com sucesso!' as status;
@@ -0,0 +1,100 @@
+-- ========================================================
+-- Adicionar updated_at em todas as tabelas singelo_*
+-- ========================================================
+-- A réplica local do app (BACKEND_DADOS = "replica") sincroniza só as linhas
+-- com updated_at maior que a última sincronização. Sem esta coluna, apenas
+-- linhas novas são vistas - alterações (ex: parcela paga) não.
+-- singelo_materiais já tem updated_at (criar_tabelas_ficha_tecnica.sql).
+-- ========================================================
+
+-- Função do trigger (a mesma de criar_tabelas_ficha_tecnica.sql)
+CREATE OR REPLACE FUNCTION atualizar_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- singelo_compras
+ALTER TABLE singelo_compras
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trigger_compras_updated_at ON singelo_compras;
+CREATE TRIGGER trigger_compras_updated_at
+    BEFORE UPDATE ON singelo_compras
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_compras_updated_at ON singelo_compras(updated_at);
+
+-- singelo_vendas
+ALTER TABLE singelo_vendas
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trigger_vendas_updated_at ON singelo_vendas;
+CREATE TRIGGER trigger_vendas_updated_at
+    BEFORE UPDATE ON singelo_vendas
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_vendas_updated_at ON singelo_vendas(updated_at);
+
+-- singelo_entregas
+ALTER TABLE singelo_entregas
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trigger_entregas_updated_at ON singelo_entregas;
+CREATE TRIGGER trigger_entregas_updated_at
+    BEFORE UPDATE ON singelo_entregas
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_entregas_updated_at ON singelo_entregas(updated_at);
+
+-- singelo_itens_compras
+ALTER TABLE singelo_itens_compras
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trigger_itens_compras_updated_at ON singelo_itens_compras;
+CREATE TRIGGER trigger_itens_compras_updated_at
+    BEFORE UPDATE ON singelo_itens_compras
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_itens_compras_updated_at ON singelo_itens_compras(updated_at);
+
+-- singelo_parcelas_compras
+ALTER TABLE singelo_parcelas_compras
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trigger_parcelas_compras_updated_at ON singelo_parcelas_compras;
+CREATE TRIGGER trigger_parcelas_compras_updated_at
+    BEFORE UPDATE ON singelo_parcelas_compras
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_parcelas_compras_updated_at ON singelo_parcelas_compras(updated_at);
+
+-- singelo_fichas_tecnicas
+ALTER TABLE singelo_fichas_tecnicas
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+DROP TRIGGER IF EXISTS trigger_fichas_tecnicas_updated_at ON singelo_fichas_tecnicas;
+CREATE TRIGGER trigger_fichas_tecnicas_updated_at
+    BEFORE UPDATE ON singelo_fichas_tecnicas
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_fichas_tecnicas_updated_at ON singelo_fichas_tecnicas(updated_at);
+
+-- Índice também em singelo_materiais
+CREATE INDEX IF NOT EXISTS idx_materiais_updated_at ON singelo_materiais(updated_at);
+
+-- Verificar
+SELECT table_name, column_name
+FROM information_schema.columns
+WHERE table_schema = 'public'
+  AND table_name LIKE 'singelo_%'
+  AND column_name = 'updated_at'
+ORDER BY table_name;
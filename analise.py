@@ -0,0 +1,149 @@
+"""
+Agregações do dashboard, do histórico e da análise de lucro, calculadas com pandas.
+
+Cada tabela entra uma vez como DataFrame (ver esquema.py) e os totais saem de somas
+e group-bys vetorizados, sem laços em Python por linha. Valores em reais são
+convertidos para centavos inteiros (int64) antes de somar: a soma fica exata, sem o
+acúmulo de erro de float de milhares de parcelas, e só volta a reais no final.
+"""
+import numpy as np
+import pandas as pd
+
+# Prefixo da descrição das compras geradas pelos custos automáticos das box
+PREFIXO_CUSTO_AUTOMATICO = "Custo automático:"
+
+# Faixas de margem da análise de lucro (% do preço de venda)
+MARGEM_OTIMA = 40
+MARGEM_BOA = 25
+
+def centavos(serie: pd.Series):
+    """Converte uma coluna em reais (número ou texto do NUMERIC do Postgres) para centavos int64"""
+    valores = pd.to_numeric(serie, errors="coerce").fillna(0).to_numpy(dtype="float64")
+    return pd.Series(np.rint(valores * 100).astype("int64"), index=serie.index)
+
+def reais(total_centavos):
+    """Centavos (inteiro ou Series) de volta para reais"""
+    return total_centavos / 100
+
+def _soma_reais(serie: pd.Series):
+    return float(reais(int(centavos(serie).sum())))
+
+# ==================== RESUMO FINANCEIRO ====================
+def resumo_financeiro(parcelas: pd.DataFrame, compras: pd.DataFrame, vendas: pd.DataFrame, entregas: pd.DataFrame):
+    """Totais do dashboard (mesmas chaves de RESUMO_ZERADO em app.py) a partir das tabelas do período.
+
+    parcelas: compra_descricao, valor_parcela | compras: valor_total, descricao
+    vendas: valor_total, taxa_entrega          | entregas: custo_entregador
+    """
+    # Custos automáticos entram pelo valor total da compra; as parcelas deles ficam de fora do cartão
+    # qualquer que seja a data da compra (mesma regra do rollup, criar_rollup_diario.sql)
+    eh_custo_auto = compras["descricao"].fillna("").str.startswith(PREFIXO_CUSTO_AUTOMATICO)
+    parcela_custo_auto = parcelas["compra_descricao"].fillna("").str.startswith(PREFIXO_CUSTO_AUTOMATICO)
+    parcelas_normais = parcelas.loc[~parcela_custo_auto]
+
+    total_compras_cartao = _soma_reais(parcelas_normais["valor_parcela"])
+    total_custos_auto = _soma_reais(compras.loc[eh_custo_auto, "valor_total"])
+    total_compras = total_compras_cartao + total_custos_auto
+
+    # Total de vendas = valor da venda + taxa de entrega cobrada do cliente
+    total_taxa_entrega_cobrada = _soma_reais(vendas["taxa_entrega"])
+    total_vendas = _soma_reais(vendas["valor_total"]) + total_taxa_entrega_cobrada
+    total_custo_entregador = _soma_reais(entregas["custo_entregador"])
+
+    return {
+        "total_compras": total_compras,
+        "total_compras_cartao": total_compras_cartao,
+        "total_custos_auto": total_custos_auto,
+        "total_vendas": total_vendas,
+        "total_taxa_entrega_cobrada": total_taxa_entrega_cobrada,
+        "total_custo_entregador": total_custo_entregador,
+        "lucro_entregas": total_taxa_entrega_cobrada - total_custo_entregador,
+        "lucro": total_vendas - total_compras
+    }
+
+# ==================== VENDAS POR PRODUTO ====================
+def vendas_por_produto(vendas: pd.DataFrame):
+    """Quantidade, valor (R$), preço médio por unidade (R$) e número de vendas de cada produto.
+
+    Os produtos ficam na ordem em que aparecem nas vendas.
+    """
+    if vendas.empty:
+        # Mesmos tipos do caso com vendas (evita colunas object nos joins de margens_por_produto)
+        return pd.DataFrame({
+            "quantidade": pd.Series(dtype="int64"),
+            "valor": pd.Series(dtype="float64"),
+            "preco_medio": pd.Series(dtype="float64"),
+            "vendas": pd.Series(dtype="int64")
+        }, index=pd.Index([], name="produto", dtype=str))
+
+    quantidade = pd.to_numeric(vendas["quantidade"], errors="coerce").fillna(0).astype("int64")
+    valor_centavos = centavos(vendas["valor_total"])
+    # Preço unitário de cada venda; a média é a média desses preços (não valor total / quantidade total)
+    preco_unitario = (valor_centavos / quantidade.where(quantidade > 0)).astype("float64")
+
+    agrupado = pd.DataFrame({
+        "produto": vendas["produto"],
+        "quantidade": quantidade,
+        "valor_centavos": valor_centavos,
+        "preco_unitario": preco_unitario
+    }).groupby("produto", sort=False).agg(
+        quantidade=("quantidade", "sum"),
+        valor_centavos=("valor_centavos", "sum"),
+        preco_medio=("preco_unitario", "mean"),
+        vendas=("quantidade", "size")
+    )
+    return pd.DataFrame({
+        "quantidade": agrupado["quantidade"],
+        "valor": reais(agrupado["valor_centavos"]),
+        "preco_medio": reais(agrupado["preco_medio"].fillna(0)),
+        "vendas": agrupado["vendas"]
+    })
+
+# ==================== ANÁLISE DE LUCRO ====================
+def materiais_das_fichas(fichas: list):
+    """Fichas técnicas (com singelo_materiais embutido) -> um DataFrame com o custo de cada material por produto"""
+    tabela = pd.json_normalize(fichas or [])
+    colunas = ["produto", "nome", "quantidade", "unidade", "custo"]
+    if tabela.empty or "singelo_materiais.custo_unitario" not in tabela:
+        return pd.DataFrame(columns=colunas)
+
+    # Fichas cujo material foi apagado não entram no custo
+    tabela = tabela.dropna(subset=["singelo_materiais.custo_unitario"])
+    quantidade = pd.to_numeric(tabela["quantidade"], errors="coerce").fillna(0)
+    custo_unitario = pd.to_numeric(tabela["singelo_materiais.custo_unitario"], errors="coerce").fillna(0)
+    return pd.DataFrame({
+        "produto": tabela["produto"],
+        "nome": tabela["singelo_materiais.nome"],
+        "quantidade": quantidade,
+        "unidade": tabela["singelo_materiais.unidade_medida"],
+        "custo": quantidade * custo_unitario
+    }).reset_index(drop=True)
+
+def margens_por_produto(materiais: pd.DataFrame, vendas: pd.DataFrame):
+    """Custo de produção, preço médio, lucro por unidade, margem e quantidade vendida de cada produto com ficha.
+
+    Ordenado pela margem (maior primeiro). Produtos sem vendas ficam com preço, lucro e margem zerados.
+    """
+    custos = materiais.groupby("produto", sort=False)["custo"].sum().rename("custo")
+    vendidos = vendas_por_produto(vendas)
+
+    tabela = custos.to_frame().join(vendidos[["preco_medio", "quantidade"]], how="left")
+    tabela["preco"] = tabela["preco_medio"].astype("float64").fillna(0)
+    tabela["qtd_vendida"] = tabela["quantidade"].astype("float64").fillna(0).astype("int64")
+    tabela["lucro"] = np.where(tabela["preco"] > 0, tabela["preco"] - tabela["custo"], 0.0)
+    tabela["margem"] = np.where(tabela["preco"] > 0, tabela["lucro"] / tabela["preco"].where(tabela["preco"] > 0) * 100, 0.0)
+
+    tabela["status"] = np.select(
+        [tabela["preco"] <= 0, tabela["margem"] >= MARGEM_OTIMA, tabela["margem"] >= MARGEM_BOA],
+        ["⚪ Sem vendas", "✅ Ótima", "⚠️ Boa"],
+        default="❌ Baixa"
+    )
+    tabela["cor"] = np.select(
+        [tabela["preco"] <= 0, tabela["margem"] >= MARGEM_OTIMA, tabela["margem"] >= MARGEM_BOA],
+        ["#6C757D", "#28A745", "#FFC107"],
+        default="#DC3545"
+    )
+
+    tabela = tabela.reset_index().rename(columns={"index": "produto"})
+    colunas = ["produto", "custo", "preco", "lucro", "margem", "cor", "status", "qtd_vendida"]
+    return tabela[colunas].sort_values("margem", ascending=False, kind="stable").reset_index(drop=True)
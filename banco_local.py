@@ -0,0 +1,523 @@
+"""
+Banco local (SQLite) com a mesma API de consultas do cliente do Supabase.
+
+Implementa o subconjunto do query builder usado pelo app:
+    supabase.table("...").select("*, outra_tabela(*)").eq(...).gte(...).lte(...)
+            .in_(...).order("coluna", desc=True).limit(n).range(inicio, fim).execute()
+    supabase.table("...").insert(dados | [dados]).execute()
+    supabase.table("...").upsert([dados], on_conflict="coluna", ignore_duplicates=True).execute()
+    supabase.table("...").update(dados).eq("id", x).execute()
+    supabase.table("...").delete().eq("id", x).execute()
+    supabase.rpc(...)  -> sempre "função não encontrada" (o app usa as consultas diretas)
+
+As tabelas seguem os scripts criar_*.sql / adicionar_*.sql, traduzidos para SQLite.
+Usado quando BACKEND_DADOS = "local" (ver app.py): o app roda sem internet e as
+consultas respondem em microssegundos, o que também deixa benchmarks repetíveis.
+"""
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+CAMINHO_BANCO_LOCAL = Path(__file__).parent / "dados" / "singelo.sqlite3"
+
+# Mesmo formato que datetime.isoformat() usado pelo app ao gravar datas
+_AGORA = "(strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))"
+
+# Esquema equivalente a criar_tabelas.sql, criar_tabela_itens_compras.sql, criar_tabela_parcelas.sql,
+# criar_tabelas_ficha_tecnica.sql, atualizar_entregas.sql e às colunas dos scripts adicionar_*.sql
+ESQUEMA_LOCAL = f"""
+CREATE TABLE IF NOT EXISTS singelo_compras (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL DEFAULT {_AGORA},
+    valor_total REAL NOT NULL CHECK (valor_total > 0),
+    descricao TEXT,
+    chave_acesso VARCHAR(44),
+    created_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_singelo_compras_data ON singelo_compras(data DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_singelo_compras_chave_acesso
+    ON singelo_compras(chave_acesso) WHERE chave_acesso IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS singelo_vendas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL DEFAULT {_AGORA},
+    produto TEXT NOT NULL,
+    quantidade INTEGER NOT NULL CHECK (quantidade > 0),
+    valor_total REAL NOT NULL CHECK (valor_total > 0),
+    tamanho TEXT,
+    data_entrega TEXT,
+    cep VARCHAR(10),
+    logradouro TEXT,
+    numero VARCHAR(20),
+    complemento TEXT,
+    bairro VARCHAR(100),
+    cidade VARCHAR(100),
+    uf VARCHAR(2),
+    taxa_entrega REAL DEFAULT 0,
+    created_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_singelo_vendas_data ON singelo_vendas(data DESC);
+CREATE INDEX IF NOT EXISTS idx_singelo_vendas_produto ON singelo_vendas(produto);
+
+CREATE TABLE IF NOT EXISTS singelo_entregas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL DEFAULT {_AGORA},
+    custo_entregador REAL NOT NULL CHECK (custo_entregador >= 0),
+    descricao TEXT,
+    created_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_singelo_entregas_data ON singelo_entregas(data DESC);
+
+CREATE TABLE IF NOT EXISTS singelo_itens_compras (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    compra_id INTEGER REFERENCES singelo_compras(id) ON DELETE CASCADE,
+    nome_produto TEXT NOT NULL,
+    descricao TEXT,
+    quantidade REAL NOT NULL,
+    valor_unitario REAL NOT NULL,
+    valor_total REAL NOT NULL,
+    created_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_itens_compras_compra_id ON singelo_itens_compras(compra_id);
+CREATE INDEX IF NOT EXISTS idx_itens_compras_nome_produto ON singelo_itens_compras(nome_produto);
+
+CREATE TABLE IF NOT EXISTS singelo_parcelas_compras (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    compra_id INTEGER REFERENCES singelo_compras(id) ON DELETE CASCADE,
+    numero_parcela INTEGER NOT NULL,
+    total_parcelas INTEGER NOT NULL,
+    valor_parcela REAL NOT NULL,
+    data_vencimento TEXT NOT NULL,
+    status VARCHAR(20) DEFAULT 'pendente' CHECK (status IN ('pendente', 'pago')),
+    data_pagamento TEXT,
+    descricao TEXT,
+    created_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_parcelas_compra_id ON singelo_parcelas_compras(compra_id);
+CREATE INDEX IF NOT EXISTS idx_parcelas_status ON singelo_parcelas_compras(status);
+CREATE INDEX IF NOT EXISTS idx_parcelas_vencimento ON singelo_parcelas_compras(data_vencimento);
+
+CREATE TABLE IF NOT EXISTS singelo_materiais (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    descricao TEXT,
+    unidade_medida TEXT NOT NULL,
+    estoque_atual REAL DEFAULT 0,
+    custo_unitario REAL NOT NULL,
+    ultima_compra_data TEXT,
+    fornecedor_principal TEXT,
+    observacoes TEXT,
+    created_at TEXT DEFAULT {_AGORA},
+    updated_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_materiais_nome ON singelo_materiais(nome);
+CREATE TRIGGER IF NOT EXISTS trigger_materiais_updated_at
+    AFTER UPDATE ON singelo_materiais FOR EACH ROW
+    WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE singelo_materiais SET updated_at = {_AGORA} WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS singelo_fichas_tecnicas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    produto TEXT NOT NULL,
+    material_id INTEGER REFERENCES singelo_materiais(id) ON DELETE CASCADE,
+    quantidade REAL NOT NULL,
+    observacoes TEXT,
+    created_at TEXT DEFAULT {_AGORA},
+    UNIQUE(produto, material_id)
+);
+CREATE INDEX IF NOT EXISTS idx_fichas_produto ON singelo_fichas_tecnicas(produto);
+CREATE INDEX IF NOT EXISTS idx_fichas_material ON singelo_fichas_tecnicas(material_id);
+
+CREATE TABLE IF NOT EXISTS singelo_movimentacoes_estoque (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    material_id INTEGER REFERENCES singelo_materiais(id) ON DELETE CASCADE,
+    tipo TEXT NOT NULL,
+    quantidade REAL NOT NULL,
+    custo_unitario REAL,
+    compra_id INTEGER REFERENCES singelo_compras(id) ON DELETE SET NULL,
+    venda_id INTEGER REFERENCES singelo_vendas(id) ON DELETE SET NULL,
+    observacoes TEXT,
+    created_at TEXT DEFAULT {_AGORA}
+);
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_material ON singelo_movimentacoes_estoque(material_id);
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_tipo ON singelo_movimentacoes_estoque(tipo);
+"""
+
+# Colunas dos scripts adicionar_*.sql posteriores ao banco local: acrescentadas em bancos já criados
+COLUNAS_ADICIONADAS = [
+    ("singelo_vendas", "chave_idempotencia", "TEXT"),
+    ("singelo_entregas", "chave_idempotencia", "TEXT"),
+    ("singelo_compras", "chave_idempotencia", "TEXT"),
+]
+INDICES_ADICIONADOS = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_singelo_vendas_chave_idempotencia ON singelo_vendas(chave_idempotencia);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_singelo_entregas_chave_idempotencia ON singelo_entregas(chave_idempotencia);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_singelo_compras_chave_idempotencia ON singelo_compras(chave_idempotencia);
+"""
+
+_REGEX_IDENTIFICADOR = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# Recurso embutido no select: nome_tabela(colunas)
+_REGEX_EMBUTIDO = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)\((.*)\)$')
+
+class ErroBancoLocal(Exception):
+    """Erro de uso da API (tabela/coluna inválida, operação sem filtro etc.)"""
+
+class RespostaLocal:
+    """Equivalente ao APIResponse do supabase-py (só os atributos usados pelo app)"""
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+def _identificador(nome: str):
+    """Valida e cita um nome de tabela/coluna (os nomes nunca vêm de dados do usuário, mas por garantia)"""
+    if not _REGEX_IDENTIFICADOR.match(nome):
+        raise ErroBancoLocal(f"Identificador inválido: {nome!r}")
+    # Colchetes e não aspas: com aspas o SQLite aceita coluna inexistente como texto, sem erro
+    return f'[{nome}]'
+
+def _valor_sql(valor):
+    """Converte valores Python para o que o SQLite guarda (datas como texto ISO)"""
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, bool):
+        return int(valor)
+    return valor
+
+def _dividir_colunas(colunas: str):
+    """Divide "a, b, tabela(x, y)" nas partes de primeiro nível (respeitando parênteses)"""
+    partes, atual, nivel = [], [], 0
+    for caractere in colunas:
+        if caractere == ',' and nivel == 0:
+            partes.append(''.join(atual).strip())
+            atual = []
+            continue
+        if caractere == '(':
+            nivel += 1
+        elif caractere == ')':
+            nivel -= 1
+        atual.append(caractere)
+    if ''.join(atual).strip():
+        partes.append(''.join(atual).strip())
+    return partes
+
+def tabelas_da_consulta(tabela: str, colunas: str = "*"):
+    """Tabelas lidas por um select: a própria e as embutidas em colunas (ex: "*, singelo_compras(data)")"""
+    tabelas = [tabela]
+    for parte in _dividir_colunas(colunas):
+        embutido = _REGEX_EMBUTIDO.match(parte)
+        if embutido:
+            tabelas.extend(tabelas_da_consulta(embutido.group(1), embutido.group(2)))
+    return tabelas
+
+class ConsultaLocal:
+    """Query builder de uma tabela - cada método devolve a própria consulta, como no supabase-py"""
+
+    def __init__(self, cliente, tabela: str):
+        self._cliente = cliente
+        self._tabela = tabela
+        self._operacao = "select"
+        self._colunas = "*"
+        self._dados = None
+        self._filtros = []
+        self._ordem = []
+        self._limite = None
+        self._deslocamento = 0
+        self._conflito = None
+
+    # ---------- operações ----------
+    def select(self, colunas: str = "*", count=None):
+        self._operacao = "select"
+        self._colunas = colunas
+        return self
+
+    def insert(self, dados):
+        self._operacao = "insert"
+        self._dados = dados
+        self._conflito = None
+        return self
+
+    def upsert(self, dados, on_conflict: str = "id", ignore_duplicates: bool = False):
+        self._operacao = "insert"
+        self._dados = dados
+        self._conflito = ([coluna.strip() for coluna in on_conflict.split(",")], ignore_duplicates)
+        return self
+
+    def update(self, dados: dict):
+        self._operacao = "update"
+        self._dados = dados
+        return self
+
+    def delete(self):
+        self._operacao = "delete"
+        return self
+
+    # ---------- filtros ----------
+    def _filtro(self, coluna, operador, valor):
+        self._filtros.append((f"{_identificador(coluna)} {operador} ?", [_valor_sql(valor)]))
+        return self
+
+    def eq(self, coluna: str, valor):
+        return self._filtro(coluna, "=", valor)
+
+    def neq(self, coluna: str, valor):
+        return self._filtro(coluna, "!=", valor)
+
+    def gt(self, coluna: str, valor):
+        return self._filtro(coluna, ">", valor)
+
+    def gte(self, coluna: str, valor):
+        return self._filtro(coluna, ">=", valor)
+
+    def lt(self, coluna: str, valor):
+        return self._filtro(coluna, "<", valor)
+
+    def lte(self, coluna: str, valor):
+        return self._filtro(coluna, "<=", valor)
+
+    def in_(self, coluna: str, valores):
+        valores = [_valor_sql(valor) for valor in valores]
+        if not valores:
+            self._filtros.append(("0", []))
+        else:
+            self._filtros.append((f"{_identificador(coluna)} IN ({', '.join('?' * len(valores))})", valores))
+        return self
+
+    def order(self, coluna: str, desc: bool = False):
+        # Mesmo posicionamento de nulos do Postgres
+        self._ordem.append(f"{_identificador(coluna)} {'DESC NULLS FIRST' if desc else 'ASC NULLS LAST'}")
+        return self
+
+    def limit(self, quantidade: int):
+        self._limite = int(quantidade)
+        return self
+
+    def range(self, inicio: int, fim: int):
+        # Como no PostgREST: linhas de inicio a fim, inclusive
+        self._deslocamento = int(inicio)
+        self._limite = int(fim) - int(inicio) + 1
+        return self
+
+    # ---------- execução ----------
+    def _where(self):
+        if not self._filtros:
+            return "", []
+        condicoes = " AND ".join(condicao for condicao, _ in self._filtros)
+        parametros = [parametro for _, valores in self._filtros for parametro in valores]
+        return f" WHERE {condicoes}", parametros
+
+    def execute(self):
+        with self._cliente._trava:
+            try:
+                if self._operacao == "insert":
+                    dados = self._executar_insert()
+                elif self._operacao == "update":
+                    dados = self._executar_update()
+                elif self._operacao == "delete":
+                    dados = self._executar_delete()
+                else:
+                    dados = self._executar_select()
+                self._cliente._conexao.commit()
+            except Exception:
+                self._cliente._conexao.rollback()
+                raise
+        return RespostaLocal(dados)
+
+    def _executar_insert(self):
+        linhas = self._dados if isinstance(self._dados, list) else [self._dados]
+        tabela = _identificador(self._tabela)
+        ids = []
+        for linha in linhas:
+            colunas = [_identificador(coluna) for coluna in linha]
+            if colunas:
+                sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+            else:
+                sql = f"INSERT INTO {tabela} DEFAULT VALUES"
+            if self._conflito is not None:
+                alvo, ignorar = self._conflito
+                atualizacoes = ", ".join(f"{c} = excluded.{c}" for c in colunas if c not in map(_identificador, alvo))
+                sql += f" ON CONFLICT({', '.join(map(_identificador, alvo))}) DO "
+                sql += "NOTHING" if ignorar or not atualizacoes else f"UPDATE SET {atualizacoes}"
+                sql += " RETURNING id"
+                gravada = self._cliente._conexao.execute(sql, [_valor_sql(valor) for valor in linha.values()]).fetchone()
+                if gravada is not None:
+                    ids.append(gravada[0])
+                continue
+            ids.append(self._cliente._conexao.execute(sql, [_valor_sql(valor) for valor in linha.values()]).lastrowid)
+        return self._linhas_por_id(ids)
+
+    def _linhas_por_id(self, ids):
+        """Relê as linhas gravadas (já com defaults, tipos convertidos e triggers aplicados), na ordem dos ids"""
+        if not ids:
+            return []
+        por_id = {linha["id"]: linha for linha in ConsultaLocal(self._cliente, self._tabela).in_("id", ids)._executar_select()}
+        return [por_id[id_] for id_ in ids if id_ in por_id]
+
+    def _executar_update(self):
+        if not self._filtros:
+            raise ErroBancoLocal("UPDATE sem filtro - use .eq() para escolher as linhas")
+        atribuicoes = ", ".join(f"{_identificador(coluna)} = ?" for coluna in self._dados)
+        where, parametros = self._where()
+        sql = f"UPDATE {_identificador(self._tabela)} SET {atribuicoes}{where} RETURNING id"
+        linhas = self._cliente._consultar(sql, [_valor_sql(valor) for valor in self._dados.values()] + parametros)
+        return self._linhas_por_id([linha["id"] for linha in linhas])
+
+    def _executar_delete(self):
+        if not self._filtros:
+            raise ErroBancoLocal("DELETE sem filtro - use .eq() para escolher as linhas")
+        where, parametros = self._where()
+        return self._cliente._consultar(f"DELETE FROM {_identificador(self._tabela)}{where} RETURNING *", parametros)
+
+    def _executar_select(self):
+        colunas, embutidos = [], []
+        for parte in _dividir_colunas(self._colunas):
+            embutido = _REGEX_EMBUTIDO.match(parte)
+            if embutido:
+                embutidos.append((embutido.group(1), embutido.group(2)))
+            elif parte == "*":
+                colunas.append("*")
+            else:
+                colunas.append(_identificador(parte))
+
+        # Colunas de ligação precisam vir na consulta para montar os embutidos
+        ligacoes = [self._cliente._ligacao(self._tabela, outra) for outra, _ in embutidos]
+        extras = [coluna for coluna, _, _ in ligacoes if "*" not in colunas and _identificador(coluna) not in colunas]
+
+        where, parametros = self._where()
+        lista_colunas = colunas + [_identificador(coluna) for coluna in extras]
+        sql = f"SELECT {', '.join(lista_colunas) or '*'} FROM {_identificador(self._tabela)}{where}"
+        if self._ordem:
+            sql += " ORDER BY " + ", ".join(self._ordem)
+        if self._limite is not None:
+            sql += f" LIMIT {self._limite} OFFSET {self._deslocamento}"
+        linhas = self._cliente._consultar(sql, parametros)
+
+        for (outra, colunas_outra), (coluna_local, coluna_outra, muitos) in zip(embutidos, ligacoes):
+            self._embutir(linhas, outra, colunas_outra, coluna_local, coluna_outra, muitos)
+        for linha in linhas:
+            for coluna in extras:
+                linha.pop(coluna, None)
+        return linhas
+
+    def _embutir(self, linhas, outra, colunas_outra, coluna_local, coluna_outra, muitos):
+        """Preenche linha[outra] com o registro relacionado (ou a lista deles, quando a relação é 1:N)"""
+        chaves = list({linha[coluna_local] for linha in linhas if linha.get(coluna_local) is not None})
+        relacionados = []
+        if chaves:
+            # A coluna de ligação entra na consulta mesmo se não foi pedida (e sai do resultado depois)
+            pedidas = [parte.strip() for parte in _dividir_colunas(colunas_outra)]
+            incluir_ligacao = "*" not in pedidas and coluna_outra not in pedidas
+            if incluir_ligacao:
+                pedidas.append(coluna_outra)
+            consulta = ConsultaLocal(self._cliente, outra).select(", ".join(pedidas)).in_(coluna_outra, chaves)
+            relacionados = consulta._executar_select()
+
+        por_chave = {}
+        for registro in relacionados:
+            chave = registro.pop(coluna_outra) if incluir_ligacao else registro[coluna_outra]
+            por_chave.setdefault(chave, []).append(registro)
+        for linha in linhas:
+            encontrados = por_chave.get(linha.get(coluna_local), [])
+            linha[outra] = encontrados if muitos else (encontrados[0] if encontrados else None)
+
+class RpcLocal:
+    """Chamada de função do banco - o SQLite não tem as funções do Postgres"""
+
+    def __init__(self, funcao: str):
+        self._funcao = funcao
+
+    def execute(self):
+        # Mesma mensagem do PostgREST: o app trata como "função ainda não criada" e usa as consultas diretas
+        raise ErroBancoLocal(f"Could not find the function public.{self._funcao} in the schema cache (PGRST202)")
+
+class ClienteLocal:
+    """Cliente com a mesma interface do supabase.Client, guardando os dados num arquivo SQLite"""
+
+    def __init__(self, caminho=CAMINHO_BANCO_LOCAL, chaves_estrangeiras: bool = True):
+        if str(caminho) != ":memory:":
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(str(caminho), check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        # Desligadas na réplica (replica_local.py): as linhas chegam fora de ordem e quem garante as regras é o Supabase
+        self._conexao.execute(f"PRAGMA foreign_keys = {'ON' if chaves_estrangeiras else 'OFF'}")
+        self._conexao.execute("PRAGMA journal_mode = WAL")
+        self._conexao.executescript(ESQUEMA_LOCAL)
+        for tabela, coluna, tipo in COLUNAS_ADICIONADAS:
+            existentes = {linha["name"] for linha in self._conexao.execute(f"PRAGMA table_info({_identificador(tabela)})")}
+            if coluna not in existentes:
+                self._conexao.execute(f"ALTER TABLE {_identificador(tabela)} ADD COLUMN {_identificador(coluna)} {tipo}")
+        self._conexao.executescript(INDICES_ADICIONADOS)
+        self._trava = threading.RLock()
+        self._ligacoes = {}
+        self._colunas = {}
+
+    def table(self, nome: str):
+        _identificador(nome)
+        return ConsultaLocal(self, nome)
+
+    def from_(self, nome: str):
+        return self.table(nome)
+
+    def rpc(self, funcao: str, parametros: dict = None):
+        return RpcLocal(funcao)
+
+    def colunas(self, tabela: str):
+        """Conjunto das colunas da tabela no banco local"""
+        if tabela not in self._colunas:
+            self._colunas[tabela] = {coluna["name"] for coluna in self._conexao.execute(f"PRAGMA table_info({_identificador(tabela)})")}
+        return self._colunas[tabela]
+
+    def gravar_linhas(self, tabela: str, linhas: list):
+        """Insere ou substitui (pelo id) linhas vindas de fora, ignorando colunas que o banco local não tem"""
+        existentes = self.colunas(tabela)
+        with self._trava:
+            for linha in linhas:
+                colunas = [coluna for coluna in linha if coluna in existentes]
+                atualizacoes = ", ".join(f"{_identificador(c)} = excluded.{_identificador(c)}" for c in colunas if c != "id")
+                sql = (f"INSERT INTO {_identificador(tabela)} ({', '.join(_identificador(c) for c in colunas)}) "
+                       f"VALUES ({', '.join('?' * len(colunas))}) "
+                       f"ON CONFLICT(id) DO {'UPDATE SET ' + atualizacoes if atualizacoes else 'NOTHING'}")
+                self._conexao.execute(sql, [_valor_sql(linha[coluna]) for coluna in colunas])
+            self._conexao.commit()
+
+    def apagar_linhas(self, tabela: str, ids):
+        """Remove as linhas com os ids informados"""
+        ids = list(ids)
+        with self._trava:
+            for inicio in range(0, len(ids), 500):
+                lote = ids[inicio:inicio + 500]
+                self._conexao.execute(f"DELETE FROM {_identificador(tabela)} WHERE id IN ({', '.join('?' * len(lote))})", lote)
+            self._conexao.commit()
+
+    def ids(self, tabela: str):
+        """Conjunto dos ids gravados na tabela"""
+        with self._trava:
+            return {linha[0] for linha in self._conexao.execute(f"SELECT id FROM {_identificador(tabela)}")}
+
+    def _consultar(self, sql: str, parametros=()):
+        return [dict(linha) for linha in self._conexao.execute(sql, parametros).fetchall()]
+
+    def _ligacao(self, tabela: str, outra: str):
+        """Descobre pela chave estrangeira como `outra` se liga a `tabela`.
+
+        Retorna (coluna em tabela, coluna em outra, relação 1:N).
+        """
+        if (tabela, outra) not in self._ligacoes:
+            for fk in self._conexao.execute(f"PRAGMA foreign_key_list({_identificador(tabela)})"):
+                if fk["table"] == outra:
+                    self._ligacoes[(tabela, outra)] = (fk["from"], fk["to"] or "id", False)
+                    break
+            else:
+                for fk in self._conexao.execute(f"PRAGMA foreign_key_list({_identificador(outra)})"):
+                    if fk["table"] == tabela:
+                        self._ligacoes[(tabela, outra)] = (fk["to"] or "id", fk["from"], True)
+                        break
+                else:
+                    raise ErroBancoLocal(f"Não há relação entre '{tabela}' e '{outra}'")
+        return self._ligacoes[(tabela, outra)]
+
+    def fechar(self):
+        self._conexao.close()
@@ -0,0 +1,98 @@
+"""
+Benchmark do leitor de NFC-e em HTML (extrair_dados_html_nfce, em nfe_parser.py).
+
+Gera páginas sintéticas no formato da consulta da SEFAZ-ES, de tamanhos crescentes:
+- "normal": todos os itens completos;
+- "sem_valor": nenhum item tem o span do valor total (página cortada/alterada);
+- "sem_qtde": nenhum item tem o span da quantidade.
+As duas últimas são as que faziam o regex antigo (com ".*?" entre os spans) voltar
+atrás por toda a página a cada item.
+
+Confere os itens lidos e se o tempo cresce de forma linear com o tamanho da página:
+sai com código 1 se o tempo por item na maior página passar de --fator vezes o da menor.
+
+Uso:
+    python benchmark_nfce.py
+    python benchmark_nfce.py --itens 100 1000 10000 50000
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from nfe_parser import extrair_dados_html_nfce
+
+CABECALHO = """<!DOCTYPE html>
+<html><body>
+<div id="u20" class="txtTopo">ARMARINHO EXEMPLO LTDA</div>
+<table id="tabResult">
+"""
+
+ITEM = """<tr id="Item + {n}"><td valign="top"><span class="txtTit">PRODUTO {n}</span><span class="RCod">(Código: {n} )</span><br />
+<span class="Rqtd"><strong>Qtde.:</strong>2</span><span class="RUN"><strong>UN: </strong>UN</span>
+<span class="RvlUnit"><strong>Vl. Unit.:</strong>1,50</span></td>
+<td align="right" valign="top" class="txtTit noWrap">Vl. Total<br /><span class="valor">3,00</span></td></tr>
+"""
+
+RODAPE = """</table>
+<div id="totalNota"><label>Valor a pagar R$:</label><span class="totalNumb txtMax">{total}</span></div>
+<li><strong>Número: </strong>123<strong> Série: </strong>1<strong>Emissão: </strong>12/03/2025 10:22:31</li>
+</body></html>
+"""
+
+VARIANTES = {
+    "normal": lambda item: item,
+    "sem_valor": lambda item: item.replace('<span class="valor">3,00</span>', ''),
+    "sem_qtde": lambda item: item.replace('<span class="Rqtd"><strong>Qtde.:</strong>2</span>', ''),
+}
+
+def gerar_pagina(qtd_itens: int, variante: str):
+    alterar = VARIANTES[variante]
+    corpo = "".join(alterar(ITEM.format(n=n)) for n in range(1, qtd_itens + 1))
+    total = f"{qtd_itens * 3},00"
+    return CABECALHO + corpo + RODAPE.format(total=total)
+
+def medir(pagina: str, repeticoes: int):
+    """Mediana (em segundos) do tempo de leitura de uma página"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        extrair_dados_html_nfce(pagina)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do leitor de NFC-e em HTML")
+    parser.add_argument("--itens", type=int, nargs="+", default=[100, 1000, 10000], help="quantidades de itens das páginas geradas")
+    parser.add_argument("--repeticoes", type=int, default=5, help="leituras por página (usa a mediana)")
+    parser.add_argument("--fator", type=float, default=3.0, help="crescimento máximo aceito do tempo por item entre a menor e a maior página")
+    args = parser.parse_args()
+
+    tamanhos = sorted(args.itens)
+    falhou = False
+
+    print(f"{'variante':<10} {'itens':>7} {'KB':>8} {'ms/página':>10} {'µs/item':>8}")
+    for variante in VARIANTES:
+        por_item = []
+        for qtd in tamanhos:
+            pagina = gerar_pagina(qtd, variante)
+            dados = extrair_dados_html_nfce(pagina)
+
+            esperados = qtd if variante == "normal" else 0
+            if not dados["sucesso"] or len(dados["itens"]) != esperados or dados["valor_total"] != qtd * 3:
+                falhou = True
+                print(f"{variante:<10} {qtd:>7} FALHOU: {len(dados['itens'])} itens lidos, {esperados} esperados - {dados['mensagem']}")
+                continue
+
+            tempo = medir(pagina, args.repeticoes)
+            por_item.append(tempo / qtd)
+            print(f"{variante:<10} {qtd:>7} {len(pagina) / 1024:>8.0f} {tempo * 1000:>10.2f} {tempo / qtd * 1e6:>8.2f}")
+
+        if len(por_item) >= 2 and por_item[-1] > por_item[0] * args.fator:
+            falhou = True
+            print(f"NÃO LINEAR: '{variante}' ficou {por_item[-1] / por_item[0]:.1f}x mais lento por item na maior página")
+
+    return 1 if falhou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Regressão e benchmark do parser de NF-e (nfe_parser.py).
+
+Roda sobre os XMLs da pasta "Notas de Compras/":
+- confere o esquema do resultado e alguns invariantes de cada nota
+  (um item por <det>, valor total = vNF, chave de acesso = nome do arquivo);
+- mede a latência de leitura por arquivo e por item.
+
+Para não depender da máquina, a regressão de desempenho é medida na mesma execução,
+numa nota sintética com centenas de <det> (o primeiro <det> de uma nota da pasta,
+repetido), onde o custo fixo por arquivo pesa pouco:
+- o tempo do parser é comparado com o de ET.fromstring nos mesmos bytes (só montar a
+  árvore, sem extrair nada): falha se passar de --razao-maxima vezes;
+- o tempo por item não pode crescer mais de --fator vezes entre a nota menor e a maior.
+
+A comparação com uma vazão absoluta (itens/s) só é feita com --baseline, e só faz
+sentido com uma baseline gravada na mesma máquina (baseline_nfe.json é um exemplo).
+
+Uso:
+    python benchmark_nfe.py                                      # valida, mede e compara com ET.fromstring
+    python benchmark_nfe.py --baseline baseline_nfe.json         # também compara com a vazão gravada
+    python benchmark_nfe.py --salvar-baseline baseline_nfe.json  # grava a vazão atual
+
+Sai com código 1 se alguma nota falhar na validação ou se o desempenho regredir.
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from nfe_parser import CAMPOS_ITEM, CAMPOS_RESULTADO, extrair_dados_xml_nfe
+
+PASTA_PADRAO = Path(__file__).parent / "Notas de Compras"
+
+# Itens das notas sintéticas (a maior é a usada na comparação com ET.fromstring)
+ITENS_SINTETICOS = [50, 500]
+
+_REGEX_DET = re.compile(rb'<(?:\w+:)?det[\s>]')
+_REGEX_BLOCO_DET = re.compile(rb'<((?:\w+:)?det)[\s>].*?</\1>', re.DOTALL)
+_REGEX_N_ITEM = re.compile(rb'nItem="\d+"')
+_REGEX_VNF = re.compile(rb'<(?:\w+:)?vNF>([^<]+)<')
+_REGEX_CHAVE_ARQUIVO = re.compile(r'\d{44}')
+
+def validar_nota(caminho: Path, conteudo: bytes, dados: dict):
+    """Retorna a lista de problemas encontrados no resultado do parser (vazia se estiver tudo certo)"""
+    problemas = []
+
+    if tuple(sorted(dados)) != tuple(sorted(CAMPOS_RESULTADO)):
+        problemas.append(f"chaves do resultado diferentes do esquema: {sorted(dados)}")
+    if not dados.get("sucesso"):
+        problemas.append(f"falha na leitura: {dados.get('mensagem')}")
+        return problemas
+
+    for i, item in enumerate(dados["itens"], 1):
+        if tuple(sorted(item)) != tuple(sorted(CAMPOS_ITEM)):
+            problemas.append(f"item {i}: chaves diferentes do esquema: {sorted(item)}")
+        for campo in ("quantidade", "valor_unitario", "valor_total"):
+            if not isinstance(item.get(campo), float):
+                problemas.append(f"item {i}: '{campo}' não é float")
+
+    qtd_det = len(_REGEX_DET.findall(conteudo))
+    if len(dados["itens"]) != qtd_det:
+        problemas.append(f"{len(dados['itens'])} itens lidos, {qtd_det} <det> no arquivo")
+
+    vnf = _REGEX_VNF.search(conteudo)
+    if vnf and abs(float(vnf.group(1)) - dados["valor_total"]) > 0.005:
+        problemas.append(f"valor_total {dados['valor_total']} diferente do vNF {vnf.group(1).decode()}")
+
+    chave_arquivo = _REGEX_CHAVE_ARQUIVO.search(caminho.name)
+    if chave_arquivo and dados["chave_acesso"] != chave_arquivo.group(0):
+        problemas.append(f"chave_acesso '{dados['chave_acesso']}' diferente do nome do arquivo")
+
+    return problemas
+
+def medir(conteudo: bytes, repeticoes: int, funcao=extrair_dados_xml_nfe):
+    """Mediana (em segundos) do tempo de leitura de uma nota"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(conteudo)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def gerar_nota_sintetica(conteudo: bytes, qtd_itens: int):
+    """A nota com os <det> trocados por qtd_itens cópias do primeiro (None se a nota não tiver <det>)"""
+    primeiro = _REGEX_BLOCO_DET.search(conteudo)
+    if primeiro is None:
+        return None
+    fim = conteudo.rindex(b"</" + primeiro.group(1) + b">") + len(primeiro.group(1)) + 3
+    corpo = b"".join(_REGEX_N_ITEM.sub(b'nItem="%d"' % n, primeiro.group(0)) for n in range(1, qtd_itens + 1))
+    return conteudo[:primeiro.start()] + corpo + conteudo[fim:]
+
+def comparar_com_referencia(conteudo: bytes, args):
+    """Mede as notas sintéticas; retorna True se o desempenho ficou dentro dos limites"""
+    ok = True
+    por_item = []
+    print(f"\n{'nota sintética':<16} {'itens':>5} {'ms parser':>10} {'ms árvore':>10} {'razão':>6} {'µs/item':>8}")
+    for qtd in ITENS_SINTETICOS:
+        nota = gerar_nota_sintetica(conteudo, qtd)
+        lidos = len(extrair_dados_xml_nfe(nota)["itens"])
+        if lidos != qtd:
+            print(f"{'':<16} {qtd:>5} FALHOU: {lidos} itens lidos")
+            return False
+        tempo = medir(nota, args.repeticoes)
+        referencia = medir(nota, args.repeticoes, ET.fromstring)
+        razao = tempo / referencia
+        por_item.append(tempo / qtd)
+        print(f"{'':<16} {qtd:>5} {tempo * 1000:>10.3f} {referencia * 1000:>10.3f} {razao:>6.2f} {tempo / qtd * 1e6:>8.1f}")
+
+    if razao > args.razao_maxima:
+        ok = False
+        print(f"REGRESSÃO: o parser levou {razao:.2f}x o tempo de ET.fromstring (máximo {args.razao_maxima:.2f}x)")
+    if por_item[-1] > por_item[0] * args.fator:
+        ok = False
+        print(f"NÃO LINEAR: {por_item[-1] / por_item[0]:.1f}x mais lento por item na maior nota")
+    if ok:
+        print(f"OK: {razao:.2f}x o tempo de ET.fromstring (máximo {args.razao_maxima:.2f}x)")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Regressão e benchmark do parser de NF-e")
+    parser.add_argument("--pasta", type=Path, default=PASTA_PADRAO, help="pasta com os XMLs (padrão: Notas de Compras/)")
+    parser.add_argument("--repeticoes", type=int, default=50, help="leituras por arquivo (usa a mediana)")
+    parser.add_argument("--razao-maxima", type=float, default=2.5, help="tempo máximo do parser em relação a ET.fromstring na nota sintética")
+    parser.add_argument("--fator", type=float, default=3.0, help="crescimento máximo aceito do tempo por item entre a menor e a maior nota sintética")
+    parser.add_argument("--baseline", type=Path, help="JSON com a vazão de referência em itens/s, gravada nesta máquina")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="queda de vazão aceita em relação à baseline (padrão: 25%%)")
+    parser.add_argument("--salvar-baseline", type=Path, help="grava a vazão medida neste JSON")
+    args = parser.parse_args()
+
+    arquivos = sorted(args.pasta.glob("*.xml"))
+    if not arquivos:
+        print(f"Nenhum XML encontrado em {args.pasta}")
+        return 1
+
+    falhou = False
+    tempo_total = 0.0
+    itens_total = 0
+    nota_modelo = None
+
+    print(f"{'arquivo':<60} {'itens':>5} {'ms/arquivo':>11} {'µs/item':>9}")
+    for caminho in arquivos:
+        conteudo = caminho.read_bytes()
+        dados = extrair_dados_xml_nfe(conteudo)
+
+        problemas = validar_nota(caminho, conteudo, dados)
+        if problemas:
+            falhou = True
+            print(f"{caminho.name:<60} FALHOU")
+            for problema in problemas:
+                print(f"    - {problema}")
+            continue
+
+        tempo = medir(conteudo, args.repeticoes)
+        qtd_itens = len(dados["itens"])
+        if nota_modelo is None and qtd_itens:
+            nota_modelo = conteudo
+        tempo_total += tempo
+        itens_total += qtd_itens
+        por_item = tempo / qtd_itens * 1e6 if qtd_itens else 0.0
+        print(f"{caminho.name:<60} {qtd_itens:>5} {tempo * 1000:>11.3f} {por_item:>9.1f}")
+
+    if itens_total == 0:
+        print("\nNenhuma nota válida para medir.")
+        return 1
+
+    vazao = itens_total / tempo_total
+    print(f"\nTotal: {len(arquivos)} arquivos, {itens_total} itens, {tempo_total * 1000:.3f} ms -> {vazao:,.0f} itens/s")
+
+    if args.salvar_baseline:
+        args.salvar_baseline.write_text(json.dumps({"itens_por_segundo": vazao}, indent=2), encoding="utf-8")
+        print(f"Baseline gravada em {args.salvar_baseline}")
+
+    if not comparar_com_referencia(nota_modelo, args):
+        falhou = True
+
+    if args.baseline:
+        referencia = json.loads(args.baseline.read_text(encoding="utf-8"))["itens_por_segundo"]
+        minimo = referencia * (1 - args.tolerancia)
+        if vazao < minimo:
+            falhou = True
+            print(f"REGRESSÃO: {vazao:,.0f} itens/s abaixo do mínimo de {minimo:,.0f} (baseline {referencia:,.0f})")
+        else:
+            print(f"OK em relação à baseline ({referencia:,.0f} itens/s, mínimo {minimo:,.0f})")
+
+    return 1 if falhou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
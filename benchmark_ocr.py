@@ -0,0 +1,55 @@
+"""
+Benchmark da leitura de cupons por foto (ocr_cupom.py).
+
+Lê as imagens de uma pasta com o motor escolhido, sem usar o cache, e mostra por cupom
+o tamanho antes/depois do preparo da imagem, os tempos de preparo e de leitura e
+quantos itens foram encontrados. Com o motor "tesseract" roda sem nenhum serviço externo.
+
+Uso:
+    python benchmark_ocr.py fotos_cupons/                         # Tesseract (offline)
+    python benchmark_ocr.py fotos_cupons/ --backend gemini        # usa GEMINI_API_KEY do ambiente
+"""
+import argparse
+import os
+import statistics
+import sys
+from pathlib import Path
+
+from ocr_cupom import BACKENDS_OCR, formatar_bytes, ler_cupom_imagem
+
+EXTENSOES_IMAGEM = {".png", ".jpg", ".jpeg", ".webp"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da leitura de cupons por foto")
+    parser.add_argument("pasta", type=Path, help="pasta com as fotos dos cupons")
+    parser.add_argument("--backend", choices=sorted(BACKENDS_OCR), default="tesseract", help="motor de leitura (padrão: tesseract)")
+    args = parser.parse_args()
+
+    imagens = sorted(caminho for caminho in args.pasta.glob("*") if caminho.suffix.lower() in EXTENSOES_IMAGEM)
+    if not imagens:
+        print(f"Nenhuma imagem encontrada em {args.pasta}")
+        return 1
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    tempos = []
+    falhou = False
+
+    print(f"{'arquivo':<40} {'original':>9} {'enviado':>9} {'preparo ms':>11} {'leitura ms':>11} {'itens':>5}")
+    for caminho in imagens:
+        try:
+            dados, relatorio = ler_cupom_imagem(caminho.read_bytes(), api_key, backend=args.backend)
+        except Exception as e:
+            falhou = True
+            print(f"{caminho.name:<40} FALHOU: {e}")
+            continue
+
+        tempos.append(relatorio['tempo_total'])
+        print(f"{caminho.name:<40} {formatar_bytes(relatorio['bytes_original']):>9} {formatar_bytes(relatorio['bytes_enviados']):>9} "
+              f"{relatorio['tempo_preparo'] * 1000:>11.1f} {relatorio['tempo_leitura'] * 1000:>11.1f} {len(dados.get('itens', [])):>5}")
+
+    if tempos:
+        print(f"\n{len(tempos)} cupons - mediana {statistics.median(tempos):.2f}s, total {sum(tempos):.2f}s ({args.backend})")
+    return 1 if falhou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
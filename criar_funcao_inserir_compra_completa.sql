@@ -0,0 +1,61 @@
+-- ========================================================
+-- Função: singelo_inserir_compra_completa
+-- Insere a compra, seus itens e suas parcelas de uma só vez
+-- ========================================================
+-- O app chama esta função via supabase.rpc() ao lançar uma compra com
+-- itens (NF-e, cupom ou lançamento manual). Tudo roda na mesma transação:
+-- se qualquer item ou parcela falhar, a compra também não é gravada.
+-- Se a função não existir, o app volta a inserir em etapas.
+-- Requer a coluna chave_acesso (adicionar_chave_acesso_compras.sql).
+-- ========================================================
+
+CREATE OR REPLACE FUNCTION singelo_inserir_compra_completa(
+  p_compra JSON,
+  p_itens JSON DEFAULT '[]',
+  p_parcelas JSON DEFAULT '[]'
+)
+RETURNS SETOF singelo_compras
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_compra singelo_compras;
+BEGIN
+  INSERT INTO singelo_compras (data, valor_total, descricao, chave_acesso)
+  VALUES (
+    COALESCE((p_compra->>'data')::TIMESTAMP WITH TIME ZONE, NOW()),
+    (p_compra->>'valor_total')::NUMERIC,
+    p_compra->>'descricao',
+    NULLIF(p_compra->>'chave_acesso', '')
+  )
+  RETURNING * INTO v_compra;
+
+  INSERT INTO singelo_itens_compras (compra_id, nome_produto, descricao, quantidade, valor_unitario, valor_total)
+  SELECT v_compra.id, i.nome_produto, i.descricao, i.quantidade, i.valor_unitario, i.valor_total
+  FROM json_to_recordset(COALESCE(p_itens, '[]'::JSON)) AS i(
+    nome_produto TEXT,
+    descricao TEXT,
+    quantidade NUMERIC,
+    valor_unitario NUMERIC,
+    valor_total NUMERIC
+  );
+
+  INSERT INTO singelo_parcelas_compras (compra_id, numero_parcela, total_parcelas, valor_parcela, data_vencimento, status, descricao)
+  SELECT v_compra.id, p.numero_parcela, p.total_parcelas, p.valor_parcela, p.data_vencimento, COALESCE(p.status, 'pendente'), p.descricao
+  FROM json_to_recordset(COALESCE(p_parcelas, '[]'::JSON)) AS p(
+    numero_parcela INTEGER,
+    total_parcelas INTEGER,
+    valor_parcela NUMERIC,
+    data_vencimento TIMESTAMP WITH TIME ZONE,
+    status VARCHAR(20),
+    descricao TEXT
+  );
+
+  RETURN NEXT v_compra;
+END;
+$$;
+
+-- Permitir que o app (chave anon) execute a função
+GRANT EXECUTE ON FUNCTION singelo_inserir_compra_completa(JSON, JSON, JSON) TO anon, authenticated;
+
+-- Verificar
+SELECT proname FROM pg_proc WHERE proname = 'singelo_inserir_compra_completa';
@@ -0,0 +1,73 @@
+-- ========================================================
+-- Função: singelo_resumo_financeiro
+-- Calcula os totais do Dashboard direto no Postgres
+-- ========================================================
+-- O app chama esta função via supabase.rpc() e recebe os oito
+-- totais em uma única resposta, em vez de baixar todas as linhas
+-- de parcelas, compras, vendas e entregas do período.
+-- Se a função não existir, o app volta a calcular pelas consultas diretas.
+-- ========================================================
+
+CREATE OR REPLACE FUNCTION singelo_resumo_financeiro(
+  p_data_inicio TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+  p_data_fim TIMESTAMP WITH TIME ZONE DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+  WITH custos_auto AS (
+    -- Custos automáticos das boxes (lançados junto com a venda)
+    SELECT c.id, c.valor_total
+    FROM singelo_compras c
+    WHERE c.descricao LIKE 'Custo automático:%'
+      AND (p_data_inicio IS NULL OR c.data >= p_data_inicio)
+      AND (p_data_fim IS NULL OR c.data <= p_data_fim)
+  ),
+  cartao AS (
+    -- Parcelas por data de vencimento, exceto as de custos automáticos
+    -- (de qualquer data, como em criar_rollup_diario.sql)
+    SELECT COALESCE(SUM(p.valor_parcela), 0) AS total
+    FROM singelo_parcelas_compras p
+    WHERE (p_data_inicio IS NULL OR p.data_vencimento >= p_data_inicio)
+      AND (p_data_fim IS NULL OR p.data_vencimento <= p_data_fim)
+      AND NOT EXISTS (
+        SELECT 1 FROM singelo_compras c
+        WHERE c.id = p.compra_id AND c.descricao LIKE 'Custo automático:%'
+      )
+  ),
+  auto AS (
+    SELECT COALESCE(SUM(valor_total), 0) AS total FROM custos_auto
+  ),
+  vendas AS (
+    SELECT
+      COALESCE(SUM(v.valor_total + COALESCE(v.taxa_entrega, 0)), 0) AS total,
+      COALESCE(SUM(COALESCE(v.taxa_entrega, 0)), 0) AS taxa
+    FROM singelo_vendas v
+    WHERE (p_data_inicio IS NULL OR v.data >= p_data_inicio)
+      AND (p_data_fim IS NULL OR v.data <= p_data_fim)
+  ),
+  entregas AS (
+    SELECT COALESCE(SUM(e.custo_entregador), 0) AS total
+    FROM singelo_entregas e
+    WHERE (p_data_inicio IS NULL OR e.data >= p_data_inicio)
+      AND (p_data_fim IS NULL OR e.data <= p_data_fim)
+  )
+  SELECT json_build_object(
+    'total_compras', cartao.total + auto.total,
+    'total_compras_cartao', cartao.total,
+    'total_custos_auto', auto.total,
+    'total_vendas', vendas.total,
+    'total_taxa_entrega_cobrada', vendas.taxa,
+    'total_custo_entregador', entregas.total,
+    'lucro_entregas', vendas.taxa - entregas.total,
+    'lucro', vendas.total - (cartao.total + auto.total)
+  )
+  FROM cartao, auto, vendas, entregas;
+$$;
+
+-- Permitir que o app (chave anon) execute a função
+GRANT EXECUTE ON FUNCTION singelo_resumo_financeiro(TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE) TO anon, authenticated;
+
+-- Verificar
+SELECT singelo_resumo_financeiro(NULL, NULL) AS resumo;
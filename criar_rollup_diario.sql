@@ -0,0 +1,369 @@
+-- ========================================================
+-- Tabela: singelo_rollup_diario
+-- Totais do Dashboard consolidados por dia
+-- ========================================================
+-- Uma linha por dia com: quantidade e valor das vendas, taxa de entrega
+-- cobrada, custo do entregador, parcelas de cartão que vencem no dia e
+-- custos automáticos das boxes. Triggers em singelo_vendas, singelo_entregas,
+-- singelo_compras e singelo_parcelas_compras somam/subtraem cada alteração
+-- na linha do dia (lançamentos do app, do SQL Editor ou em cascata).
+--
+-- singelo_resumo_financeiro passa a somar esta tabela (no máximo algumas
+-- centenas de linhas por período) em vez de varrer as tabelas de lançamentos.
+--
+-- Os dias são contados em UTC, como as datas que o app envia nos filtros.
+-- Parcela de cartão = parcela de compra que não é "Custo automático:",
+-- independente da data da compra.
+--
+-- Rode depois de criar_funcao_resumo_financeiro.sql. Para refazer a tabela
+-- do zero a qualquer momento: SELECT singelo_reconstruir_rollup();
+-- ========================================================
+
+CREATE TABLE IF NOT EXISTS singelo_rollup_diario (
+  dia DATE PRIMARY KEY,
+  qtd_vendas INTEGER NOT NULL DEFAULT 0,
+  valor_vendas NUMERIC(12, 2) NOT NULL DEFAULT 0,
+  taxa_entrega_cobrada NUMERIC(12, 2) NOT NULL DEFAULT 0,
+  custo_entregador NUMERIC(12, 2) NOT NULL DEFAULT 0,
+  parcelas_cartao NUMERIC(12, 2) NOT NULL DEFAULT 0,
+  custos_auto NUMERIC(12, 2) NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE singelo_rollup_diario IS 'Totais por dia (UTC) mantidos por triggers - base do resumo financeiro';
+COMMENT ON COLUMN singelo_rollup_diario.valor_vendas IS 'Soma de valor_total das vendas (sem a taxa de entrega)';
+COMMENT ON COLUMN singelo_rollup_diario.parcelas_cartao IS 'Parcelas com vencimento no dia, exceto as de custos automáticos';
+COMMENT ON COLUMN singelo_rollup_diario.custos_auto IS 'Valor total das compras "Custo automático:" feitas no dia';
+
+-- Só leitura para o app: quem grava são os triggers (funções SECURITY DEFINER)
+ALTER TABLE singelo_rollup_diario ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Permitir leitura em singelo_rollup_diario" ON singelo_rollup_diario;
+CREATE POLICY "Permitir leitura em singelo_rollup_diario"
+ON singelo_rollup_diario
+FOR SELECT
+USING (true);
+
+-- ========================================================
+-- Funções auxiliares
+-- ========================================================
+
+-- Dia (UTC) de um lançamento
+CREATE OR REPLACE FUNCTION singelo_dia_rollup(p_momento TIMESTAMP WITH TIME ZONE)
+RETURNS DATE
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT (p_momento AT TIME ZONE 'UTC')::DATE;
+$$;
+
+-- A compra é um custo automático das boxes?
+CREATE OR REPLACE FUNCTION singelo_compra_eh_custo_auto(p_compra_id BIGINT)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT EXISTS (
+    SELECT 1 FROM singelo_compras
+    WHERE id = p_compra_id AND descricao LIKE 'Custo automático:%'
+  );
+$$;
+
+-- Soma (ou subtrai, com valores negativos) na linha do dia.
+-- Somar diferenças, em vez de recalcular o dia, não perde lançamentos de
+-- transações simultâneas: o ON CONFLICT serializa as somas na mesma linha.
+CREATE OR REPLACE FUNCTION singelo_somar_rollup(
+  p_dia DATE,
+  p_qtd_vendas INTEGER DEFAULT 0,
+  p_valor_vendas NUMERIC DEFAULT 0,
+  p_taxa_entrega NUMERIC DEFAULT 0,
+  p_custo_entregador NUMERIC DEFAULT 0,
+  p_parcelas_cartao NUMERIC DEFAULT 0,
+  p_custos_auto NUMERIC DEFAULT 0
+)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO singelo_rollup_diario AS r (
+    dia, qtd_vendas, valor_vendas, taxa_entrega_cobrada, custo_entregador, parcelas_cartao, custos_auto, updated_at
+  )
+  VALUES (
+    p_dia, p_qtd_vendas, p_valor_vendas, p_taxa_entrega, p_custo_entregador, p_parcelas_cartao, p_custos_auto, NOW()
+  )
+  ON CONFLICT (dia) DO UPDATE SET
+    qtd_vendas = r.qtd_vendas + EXCLUDED.qtd_vendas,
+    valor_vendas = r.valor_vendas + EXCLUDED.valor_vendas,
+    taxa_entrega_cobrada = r.taxa_entrega_cobrada + EXCLUDED.taxa_entrega_cobrada,
+    custo_entregador = r.custo_entregador + EXCLUDED.custo_entregador,
+    parcelas_cartao = r.parcelas_cartao + EXCLUDED.parcelas_cartao,
+    custos_auto = r.custos_auto + EXCLUDED.custos_auto,
+    updated_at = NOW();
+$$;
+
+-- ========================================================
+-- Triggers
+-- ========================================================
+-- SECURITY DEFINER: os triggers disparam com o usuário do app (anon), que
+-- não pode chamar singelo_somar_rollup diretamente (ver REVOKE no final)
+
+-- singelo_vendas
+CREATE OR REPLACE FUNCTION singelo_rollup_vendas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM singelo_somar_rollup(
+      singelo_dia_rollup(OLD.data),
+      p_qtd_vendas => -1,
+      p_valor_vendas => -OLD.valor_total,
+      p_taxa_entrega => -COALESCE(OLD.taxa_entrega, 0)
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM singelo_somar_rollup(
+      singelo_dia_rollup(NEW.data),
+      p_qtd_vendas => 1,
+      p_valor_vendas => NEW.valor_total,
+      p_taxa_entrega => COALESCE(NEW.taxa_entrega, 0)
+    );
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_vendas_rollup ON singelo_vendas;
+CREATE TRIGGER trigger_vendas_rollup
+    AFTER INSERT OR UPDATE OF data, valor_total, taxa_entrega OR DELETE ON singelo_vendas
+    FOR EACH ROW
+    EXECUTE FUNCTION singelo_rollup_vendas();
+
+-- singelo_entregas
+CREATE OR REPLACE FUNCTION singelo_rollup_entregas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM singelo_somar_rollup(singelo_dia_rollup(OLD.data), p_custo_entregador => -OLD.custo_entregador);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM singelo_somar_rollup(singelo_dia_rollup(NEW.data), p_custo_entregador => NEW.custo_entregador);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_entregas_rollup ON singelo_entregas;
+CREATE TRIGGER trigger_entregas_rollup
+    AFTER INSERT OR UPDATE OF data, custo_entregador OR DELETE ON singelo_entregas
+    FOR EACH ROW
+    EXECUTE FUNCTION singelo_rollup_entregas();
+
+-- singelo_parcelas_compras
+CREATE OR REPLACE FUNCTION singelo_rollup_parcelas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    IF TG_OP = 'DELETE' AND OLD.compra_id IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM singelo_compras WHERE id = OLD.compra_id) THEN
+      -- Exclusão em cascata: a compra já descontou as parcelas (singelo_rollup_compras_antes_excluir)
+      NULL;
+    ELSIF NOT singelo_compra_eh_custo_auto(OLD.compra_id) THEN
+      PERFORM singelo_somar_rollup(singelo_dia_rollup(OLD.data_vencimento), p_parcelas_cartao => -OLD.valor_parcela);
+    END IF;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NOT singelo_compra_eh_custo_auto(NEW.compra_id) THEN
+    PERFORM singelo_somar_rollup(singelo_dia_rollup(NEW.data_vencimento), p_parcelas_cartao => NEW.valor_parcela);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_parcelas_rollup ON singelo_parcelas_compras;
+CREATE TRIGGER trigger_parcelas_rollup
+    AFTER INSERT OR UPDATE OF compra_id, data_vencimento, valor_parcela OR DELETE ON singelo_parcelas_compras
+    FOR EACH ROW
+    EXECUTE FUNCTION singelo_rollup_parcelas();
+
+-- singelo_compras: custos automáticos e mudança de tipo da compra
+CREATE OR REPLACE FUNCTION singelo_rollup_compras()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_era_auto BOOLEAN := FALSE;
+  v_eh_auto BOOLEAN := FALSE;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    v_era_auto := COALESCE(OLD.descricao, '') LIKE 'Custo automático:%';
+    IF v_era_auto THEN
+      PERFORM singelo_somar_rollup(singelo_dia_rollup(OLD.data), p_custos_auto => -OLD.valor_total);
+    END IF;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    v_eh_auto := COALESCE(NEW.descricao, '') LIKE 'Custo automático:%';
+    IF v_eh_auto THEN
+      PERFORM singelo_somar_rollup(singelo_dia_rollup(NEW.data), p_custos_auto => NEW.valor_total);
+    END IF;
+  END IF;
+
+  -- A compra virou (ou deixou de ser) custo automático: as parcelas dela saem (ou entram) no cartão
+  IF TG_OP = 'UPDATE' AND v_era_auto <> v_eh_auto THEN
+    PERFORM singelo_somar_rollup(p.dia, p_parcelas_cartao => CASE WHEN v_eh_auto THEN -p.total ELSE p.total END)
+    FROM (
+      SELECT singelo_dia_rollup(data_vencimento) AS dia, SUM(valor_parcela) AS total
+      FROM singelo_parcelas_compras
+      WHERE compra_id = NEW.id
+      GROUP BY 1
+    ) p;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_compras_rollup ON singelo_compras;
+CREATE TRIGGER trigger_compras_rollup
+    AFTER INSERT OR UPDATE OF data, valor_total, descricao OR DELETE ON singelo_compras
+    FOR EACH ROW
+    EXECUTE FUNCTION singelo_rollup_compras();
+
+-- Antes de apagar uma compra, descontar as parcelas de cartão dela
+-- (na exclusão em cascata das parcelas a compra já não existe para consulta)
+CREATE OR REPLACE FUNCTION singelo_rollup_compras_antes_excluir()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF NOT COALESCE(OLD.descricao, '') LIKE 'Custo automático:%' THEN
+    PERFORM singelo_somar_rollup(p.dia, p_parcelas_cartao => -p.total)
+    FROM (
+      SELECT singelo_dia_rollup(data_vencimento) AS dia, SUM(valor_parcela) AS total
+      FROM singelo_parcelas_compras
+      WHERE compra_id = OLD.id
+      GROUP BY 1
+    ) p;
+  END IF;
+  RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_compras_rollup_antes_excluir ON singelo_compras;
+CREATE TRIGGER trigger_compras_rollup_antes_excluir
+    BEFORE DELETE ON singelo_compras
+    FOR EACH ROW
+    EXECUTE FUNCTION singelo_rollup_compras_antes_excluir();
+
+-- ========================================================
+-- Carga inicial / reconstrução completa
+-- ========================================================
+CREATE OR REPLACE FUNCTION singelo_reconstruir_rollup()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_dias INTEGER;
+BEGIN
+  -- Bloqueia gravações nas tabelas de lançamentos enquanto recalcula
+  LOCK TABLE singelo_vendas, singelo_entregas, singelo_compras, singelo_parcelas_compras IN SHARE MODE;
+  LOCK TABLE singelo_rollup_diario IN EXCLUSIVE MODE;
+
+  DELETE FROM singelo_rollup_diario;
+
+  INSERT INTO singelo_rollup_diario (
+    dia, qtd_vendas, valor_vendas, taxa_entrega_cobrada, custo_entregador, parcelas_cartao, custos_auto, updated_at
+  )
+  SELECT dia, SUM(qtd_vendas), SUM(valor_vendas), SUM(taxa_entrega), SUM(custo_entregador), SUM(parcelas_cartao), SUM(custos_auto), NOW()
+  FROM (
+    SELECT singelo_dia_rollup(v.data) AS dia, 1 AS qtd_vendas, v.valor_total AS valor_vendas,
+           COALESCE(v.taxa_entrega, 0) AS taxa_entrega, 0 AS custo_entregador, 0 AS parcelas_cartao, 0 AS custos_auto
+    FROM singelo_vendas v
+    UNION ALL
+    SELECT singelo_dia_rollup(e.data), 0, 0, 0, e.custo_entregador, 0, 0
+    FROM singelo_entregas e
+    UNION ALL
+    SELECT singelo_dia_rollup(c.data), 0, 0, 0, 0, 0, c.valor_total
+    FROM singelo_compras c
+    WHERE c.descricao LIKE 'Custo automático:%'
+    UNION ALL
+    SELECT singelo_dia_rollup(p.data_vencimento), 0, 0, 0, 0, p.valor_parcela, 0
+    FROM singelo_parcelas_compras p
+    WHERE NOT EXISTS (
+      SELECT 1 FROM singelo_compras c
+      WHERE c.id = p.compra_id AND c.descricao LIKE 'Custo automático:%'
+    )
+  ) lancamentos
+  GROUP BY dia;
+
+  GET DIAGNOSTICS v_dias = ROW_COUNT;
+  RETURN v_dias;
+END;
+$$;
+
+SELECT singelo_reconstruir_rollup();
+
+-- ========================================================
+-- Resumo financeiro a partir do rollup
+-- ========================================================
+-- Mesma assinatura e mesmo JSON de criar_funcao_resumo_financeiro.sql
+CREATE OR REPLACE FUNCTION singelo_resumo_financeiro(
+  p_data_inicio TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+  p_data_fim TIMESTAMP WITH TIME ZONE DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+  WITH totais AS (
+    SELECT
+      COALESCE(SUM(parcelas_cartao), 0) AS cartao,
+      COALESCE(SUM(custos_auto), 0) AS auto,
+      COALESCE(SUM(valor_vendas + taxa_entrega_cobrada), 0) AS vendas,
+      COALESCE(SUM(taxa_entrega_cobrada), 0) AS taxa,
+      COALESCE(SUM(custo_entregador), 0) AS entregas
+    FROM singelo_rollup_diario
+    WHERE (p_data_inicio IS NULL OR dia >= singelo_dia_rollup(p_data_inicio))
+      AND (p_data_fim IS NULL OR dia <= singelo_dia_rollup(p_data_fim))
+  )
+  SELECT json_build_object(
+    'total_compras', cartao + auto,
+    'total_compras_cartao', cartao,
+    'total_custos_auto', auto,
+    'total_vendas', vendas,
+    'total_taxa_entrega_cobrada', taxa,
+    'total_custo_entregador', entregas,
+    'lucro_entregas', taxa - entregas,
+    'lucro', vendas - (cartao + auto)
+  )
+  FROM totais;
+$$;
+
+-- Permitir que o app (chave anon) execute as funções
+GRANT EXECUTE ON FUNCTION singelo_resumo_financeiro(TIMESTAMP WITH TIME ZONE, TIMESTAMP WITH TIME ZONE) TO anon, authenticated;
+GRANT SELECT ON singelo_rollup_diario TO anon, authenticated;
+
+-- As funções SECURITY DEFINER gravam no rollup: só os triggers (e o dono) podem chamá-las
+REVOKE EXECUTE ON FUNCTION singelo_somar_rollup(DATE, INTEGER, NUMERIC, NUMERIC, NUMERIC, NUMERIC, NUMERIC) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION singelo_reconstruir_rollup() FROM PUBLIC, anon, authenticated;
+
+-- Verificar
+SELECT dia, qtd_vendas, valor_vendas, taxa_entrega_cobrada, custo_entregador, parcelas_cartao, custos_auto
+FROM singelo_rollup_diario
+ORDER BY dia DESC
+LIMIT 10;
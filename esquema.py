@@ -0,0 +1,107 @@
+"""
+Registro das colunas que cada tela lê do Supabase, com o tipo Python de cada uma.
+
+Cada visão declara a tabela e as colunas que a tela usa. As consultas pedem só
+essas colunas (nada de select("*")), e o resultado vira um DataFrame tipado numa
+única conversão por coluna, em vez de float(...) e datetime.fromisoformat(...)
+linha a linha:
+- int      -> Int64 (inteiro que aceita nulo)
+- float    -> float64 (nulo vira 0: as colunas float são valores em reais)
+- str      -> texto (nulo vira "")
+- datetime -> datetime64 em UTC (timestamps do Postgres, com ou sem fração de segundo)
+
+Colunas de outra tabela (ex: a data da compra de cada parcela) entram como
+"embutidas": o PostgREST traz o recurso relacionado na mesma consulta e a coluna
+vira uma coluna comum do DataFrame.
+"""
+from datetime import datetime
+from typing import NamedTuple
+
+import pandas as pd
+
+class Visao(NamedTuple):
+    """Tabela e colunas (nome -> tipo Python) lidas por uma tela.
+
+    embutidas: nome no DataFrame -> (tabela relacionada, coluna); o tipo fica em colunas.
+    """
+    tabela: str
+    colunas: dict
+    embutidas: dict = {}
+
+VISOES = {
+    # Dashboard (card "Total Vendas") e resumo financeiro
+    "vendas_periodo": Visao("singelo_vendas", {
+        "id": int, "data": datetime, "data_entrega": datetime, "produto": str, "tamanho": str,
+        "quantidade": int, "valor_total": float, "taxa_entrega": float
+    }),
+    # Listas de vendas (dashboard e histórico)
+    "vendas_lista": Visao("singelo_vendas", {
+        "id": int, "data": datetime, "produto": str, "tamanho": str,
+        "quantidade": int, "valor_total": float, "taxa_entrega": float
+    }),
+    # Análise de lucro: preço médio e quantidade vendida por produto
+    "vendas_por_produto": Visao("singelo_vendas", {
+        "produto": str, "quantidade": int, "valor_total": float
+    }),
+    # Listas de compras (dashboard e histórico)
+    "compras_lista": Visao("singelo_compras", {
+        "id": int, "data": datetime, "valor_total": float, "descricao": str
+    }),
+    # Resumo financeiro (analise.resumo_financeiro): só o que entra nos totais
+    "compras_resumo": Visao("singelo_compras", {
+        "valor_total": float, "descricao": str
+    }),
+    "entregas_resumo": Visao("singelo_entregas", {
+        "custo_entregador": float
+    }),
+    # Listas de parcelas (cards do dashboard e Contas a Pagar) e resumo financeiro,
+    # com a data de emissão e a descrição da compra
+    "parcelas_lista": Visao("singelo_parcelas_compras", {
+        "id": int, "compra_id": int, "numero_parcela": int, "total_parcelas": int,
+        "valor_parcela": float, "data_vencimento": datetime, "status": str, "descricao": str,
+        "data_pagamento": datetime, "data_emissao": datetime, "compra_descricao": str
+    }, embutidas={"data_emissao": ("singelo_compras", "data"), "compra_descricao": ("singelo_compras", "descricao")}),
+    # Lista de custos de entrega (histórico)
+    "entregas_lista": Visao("singelo_entregas", {
+        "id": int, "data": datetime, "custo_entregador": float, "descricao": str
+    }),
+}
+
+def colunas_da_visao(nome: str):
+    """Texto do select() com as colunas da visão (as embutidas como tabela(colunas))"""
+    visao = VISOES[nome]
+    colunas = [coluna for coluna in visao.colunas if coluna not in visao.embutidas]
+    relacionadas = {}
+    for tabela, coluna in visao.embutidas.values():
+        relacionadas.setdefault(tabela, []).append(coluna)
+    colunas += [f"{tabela}({', '.join(lista)})" for tabela, lista in relacionadas.items()]
+    return ", ".join(colunas)
+
+def consultar_visao(supabase, nome: str):
+    """Inicia a consulta da visão (tabela + select só das colunas declaradas); filtros e ordem ficam com quem chama"""
+    visao = VISOES[nome]
+    return supabase.table(visao.tabela).select(colunas_da_visao(nome))
+
+def _converter_coluna(serie: pd.Series, tipo):
+    if tipo is datetime:
+        return pd.to_datetime(serie, utc=True, format="ISO8601", errors="coerce")
+    if tipo is int:
+        return pd.to_numeric(serie, errors="coerce").astype("Int64")
+    if tipo is float:
+        return pd.to_numeric(serie, errors="coerce").fillna(0).astype("float64")
+    return serie.fillna("").astype(str)
+
+def decodificar_visao(linhas: list, nome: str):
+    """Converte as linhas devolvidas pelo Supabase num DataFrame com os tipos declarados na visão"""
+    visao = VISOES[nome]
+    colunas = visao.colunas
+    if visao.embutidas:
+        # {"singelo_compras": {"data": ...}} -> coluna data_emissao (nulo se não houver registro relacionado)
+        linhas = [
+            dict(linha, **{nome_coluna: (linha.get(tabela) or {}).get(coluna) for nome_coluna, (tabela, coluna) in visao.embutidas.items()})
+            for linha in linhas or []
+        ]
+    tabela = pd.DataFrame.from_records(linhas or [], columns=list(colunas))
+    for coluna, tipo in colunas.items():
+        tabela[coluna] = _converter_coluna(tabela[coluna], tipo)
+    return tabela
@@ -0,0 +1,81 @@
+"""
+Importa em lote todos os XMLs de NF-e de uma pasta para o Supabase.
+
+Uso:
+    python importar_nfes.py "Notas de Compras"
+    python importar_nfes.py "Notas de Compras" --parcelas 0       # pagas à vista (sem parcelas)
+    python importar_nfes.py "Notas de Compras" --simular          # só lê e mostra o que seria importado
+
+As notas são lidas em paralelo (pool de processos), as repetidas (mesma chave de acesso)
+e as já registradas no banco são ignoradas, e as compras são registradas com inserts em lote.
+Pode ser executado de novo sobre a mesma pasta sem duplicar compras.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from nfe_parser import deduplicar_nfes, ler_pasta_nfes
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa em lote os XMLs de NF-e de uma pasta")
+    parser.add_argument("pasta", type=Path, help="pasta com os arquivos XML")
+    parser.add_argument("--parcelas", type=int, default=1, help="parcelas de cada nota no cartão (0 = pago à vista, sem parcelas)")
+    parser.add_argument("--processos", type=int, default=None, help="processos usados na leitura (padrão: nº de CPUs)")
+    parser.add_argument("--simular", action="store_true", help="apenas lê as notas, sem gravar no banco")
+    args = parser.parse_args()
+
+    if not args.pasta.is_dir():
+        print(f"❌ Pasta não encontrada: {args.pasta}")
+        return 1
+
+    inicio = time.perf_counter()
+    resultados = ler_pasta_nfes(args.pasta, args.processos)
+    tempo_leitura = time.perf_counter() - inicio
+
+    lidas = []
+    for nome, dados in resultados:
+        if not dados['sucesso']:
+            print(f"⚠️ {nome}: {dados['mensagem']}")
+        elif dados['valor_total'] <= 0:
+            print(f"⚠️ {nome}: valor total zerado")
+        else:
+            lidas.append((nome, dados))
+
+    notas, repetidas = deduplicar_nfes(lidas)
+    for nome, dados in repetidas:
+        print(f"🔁 {nome}: repetida (chave {dados['chave_acesso']})")
+
+    print(f"📄 {len(resultados)} arquivos lidos em {tempo_leitura:.2f}s - {len(notas)} notas a importar")
+    for nome, dados in notas:
+        print(f"   {nome}: {dados['fornecedor']} - {dados['data'].strftime('%d/%m/%Y')} - "
+              f"{len(dados['itens'])} itens - R$ {dados['valor_total']:,.2f}")
+
+    if args.simular or not notas:
+        return 0
+
+    # Importado aqui para que --simular funcione sem as dependências do app
+    from app import init_supabase, inserir_compras_em_lote, separar_nfes_importadas
+
+    supabase = init_supabase()
+    if supabase is None:
+        print("❌ Não foi possível conectar ao Supabase")
+        return 1
+
+    # Importação idempotente: notas já registradas (mesma chave de acesso) são puladas
+    notas, ja_importadas = separar_nfes_importadas(supabase, notas)
+    for nome, dados in ja_importadas:
+        print(f"⏭️ {nome}: já importada")
+    if not notas:
+        print("✅ Nenhuma nota nova para importar")
+        return 0
+
+    compras, falhas = inserir_compras_em_lote(supabase, [dados for _, dados in notas], args.parcelas)
+    for falha in falhas:
+        print(f"❌ Erro ao registrar {falha}")
+
+    print(f"✅ {len(compras)} compras registradas em {time.perf_counter() - inicio:.2f}s")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
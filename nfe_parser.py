@@ -0,0 +1,426 @@
+"""
+Leitura de NF-e (Nota Fiscal Eletrônica) em XML e de NFC-e na página HTML da SEFAZ.
+
+Parser único usado pelo app (importação de NF-e, cupom em XML ou HTML e busca por
+chave), pelo benchmark_nfe.py e pelo benchmark_nfce.py. Depende apenas da biblioteca padrão.
+"""
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Namespaces da NF-e e da assinatura digital
+NS_NFE = 'http://www.portalfiscal.inf.br/nfe'
+NS_ASSINATURA = 'http://www.w3.org/2000/09/xmldsig#'
+
+# Tamanho dos blocos entregues ao parser incremental
+TAMANHO_BLOCO_XML = 64 * 1024
+
+# Abaixo desta quantidade de arquivos a leitura em lote é sequencial (não compensa abrir processos)
+MINIMO_ARQUIVOS_PARALELO = 8
+
+# Tamanho máximo do nome curto do item (o nome completo fica em 'descricao')
+TAMANHO_NOME_ITEM = 50
+
+# Esquema estável do resultado: toda chamada devolve exatamente estas chaves
+CAMPOS_RESULTADO = ("valor_total", "data", "descricao", "fornecedor", "numero_nf", "chave_acesso",
+                    "itens", "sucesso", "mensagem", "tipo_documento")
+CAMPOS_ITEM = ("nome", "descricao", "codigo", "quantidade", "valor_unitario", "valor_total")
+
+# Chave de acesso no nome do arquivo (ex: NFE-3525...643.xml)
+_REGEX_CHAVE_NOME_ARQUIVO = re.compile(r'(?<!\d)\d{44}(?!\d)')
+
+def _resultado_erro(mensagem):
+    """Resultado de falha com o mesmo esquema do resultado de sucesso"""
+    return {
+        "valor_total": 0.0,
+        "data": datetime.now(),
+        "descricao": "",
+        "fornecedor": "",
+        "numero_nf": "",
+        "chave_acesso": "",
+        "itens": [],
+        "sucesso": False,
+        "mensagem": mensagem,
+        "tipo_documento": "NF-e"
+    }
+
+def _limpar_xml_nfe(xml_content):
+    """Limpa XMLs "sujos" (BOM, entidades HTML, HTML antes/depois da nota) para uma segunda tentativa"""
+    # Se for bytes, decodificar
+    if isinstance(xml_content, bytes):
+        try:
+            xml_content = xml_content.decode('utf-8')
+        except:
+            xml_content = xml_content.decode('latin-1')
+
+    # Remover BOM (Byte Order Mark)
+    xml_content = xml_content.replace('\ufeff', '')
+
+    # Remover possíveis tags HTML
+    xml_content = xml_content.replace('&nbsp;', ' ')
+    xml_content = xml_content.replace('&amp;', '&')
+    xml_content = xml_content.replace('&lt;', '<')
+    xml_content = xml_content.replace('&gt;', '>')
+
+    # Tentar encontrar o início do XML se houver HTML antes
+    if '<?xml' in xml_content:
+        xml_content = xml_content[xml_content.index('<?xml'):]
+    elif '<nfeProc' in xml_content:
+        xml_content = '<?xml version="1.0" encoding="UTF-8"?>' + xml_content[xml_content.index('<nfeProc'):]
+    elif '<NFe' in xml_content:
+        xml_content = '<?xml version="1.0" encoding="UTF-8"?>' + xml_content[xml_content.index('<NFe'):]
+
+    # Remover qualquer coisa depois da tag de fechamento
+    if '</nfeProc>' in xml_content:
+        xml_content = xml_content[:xml_content.index('</nfeProc>') + len('</nfeProc>')]
+    elif '</NFe>' in xml_content:
+        xml_content = xml_content[:xml_content.index('</NFe>') + len('</NFe>')]
+
+    # Sem a declaração de encoding o texto já decodificado é lido como está
+    if xml_content.startswith('<?xml'):
+        xml_content = xml_content[xml_content.index('?>') + 2:]
+    return xml_content
+
+def _ler_nfe_incremental(xml_content):
+    """Lê a NF-e com um parser incremental (XMLPullParser), em blocos.
+
+    O namespace é resolvido uma vez, no primeiro elemento lido; cada <det> vira um item assim
+    que é fechado e é descartado em seguida, então a memória não cresce com a nota.
+    Retorna (campos, itens), onde campos guarda o texto da primeira ocorrência de cada tag.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    tags = None
+    campos = {}
+    itens = []
+
+    def processar_eventos():
+        nonlocal tags
+        for _, elem in parser.read_events():
+            if tags is None:
+                # Namespace resolvido uma única vez, a partir do primeiro elemento fechado
+                prefixo = elem.tag[:elem.tag.index('}') + 1] if elem.tag.startswith('{') else ''
+                tags = {
+                    'campos': {prefixo + nome: nome for nome in ('vNF', 'dhEmi', 'xFant', 'xNome', 'nNF', 'chNFe')},
+                    'infNFe': prefixo + 'infNFe',
+                    'det': prefixo + 'det',
+                    'prod': prefixo + 'prod',
+                    'cProd': prefixo + 'cProd',
+                    'xProd': prefixo + 'xProd',
+                    'qCom': prefixo + 'qCom',
+                    'vUnCom': prefixo + 'vUnCom',
+                    'vProd': prefixo + 'vProd',
+                    # Fora dos dados da nota (assinatura e protocolo) - descartados ao fechar
+                    'descartaveis': {'{%s}Signature' % NS_ASSINATURA, prefixo + 'protNFe'}
+                }
+
+            tag = elem.tag
+            if tag == tags['det']:
+                prod = elem.find(tags['prod'])
+                if prod is not None:
+                    nome_prod = prod.find(tags['xProd'])
+                    codigo = prod.find(tags['cProd'])
+                    qtd_prod = prod.find(tags['qCom'])
+                    valor_unit = prod.find(tags['vUnCom'])
+                    valor_prod = prod.find(tags['vProd'])
+
+                    if nome_prod is not None:
+                        nome_completo = nome_prod.text or ""
+                        itens.append({
+                            'nome': nome_completo[:TAMANHO_NOME_ITEM],
+                            'descricao': nome_completo,
+                            'codigo': (codigo.text or "") if codigo is not None else "",
+                            'quantidade': float(qtd_prod.text) if qtd_prod is not None else 0.0,
+                            'valor_unitario': float(valor_unit.text) if valor_unit is not None else 0.0,
+                            'valor_total': float(valor_prod.text) if valor_prod is not None else 0.0
+                        })
+                elem.clear()
+            elif tag in tags['campos']:
+                campos.setdefault(tags['campos'][tag], elem.text)
+            elif tag == tags['infNFe']:
+                # Id="NFe" + chave de acesso
+                campos.setdefault('infNFe', elem.get('Id') or "")
+            elif tag in tags['descartaveis']:
+                elem.clear()
+
+    if isinstance(xml_content, str):
+        parser.feed(xml_content)
+        processar_eventos()
+    else:
+        for inicio in range(0, len(xml_content), TAMANHO_BLOCO_XML):
+            parser.feed(xml_content[inicio:inicio + TAMANHO_BLOCO_XML])
+            processar_eventos()
+    parser.close()
+    processar_eventos()
+
+    return campos, itens
+
+def _extrair_chave_acesso(campos):
+    """Chave de acesso (44 dígitos) a partir do Id do infNFe ou, na falta dele, do protocolo"""
+    for valor in (campos.get('infNFe'), campos.get('chNFe')):
+        digitos = ''.join(c for c in (valor or "") if c.isdigit())
+        if len(digitos) == 44:
+            return digitos
+    return ""
+
+def chave_acesso_do_nome_arquivo(nome_arquivo):
+    """Chave de acesso (44 dígitos) contida no nome do arquivo, ou "" se não houver"""
+    encontrada = _REGEX_CHAVE_NOME_ARQUIVO.search(nome_arquivo or "")
+    return encontrada.group(0) if encontrada else ""
+
+def extrair_dados_xml_nfe(xml_content):
+    """Extrai dados relevantes do XML da NF-e (bytes ou texto).
+
+    Sempre retorna um dict com as chaves de CAMPOS_RESULTADO; cada item tem as chaves de CAMPOS_ITEM.
+    O valor total é o vNF da nota (com frete, descontos e impostos).
+    """
+    try:
+        try:
+            campos, itens = _ler_nfe_incremental(xml_content)
+        except ET.ParseError:
+            campos = None
+
+        if campos is None or 'infNFe' not in campos:
+            # XML com sujeira (HTML, entidades, BOM) ou nota dentro de outro documento - limpar e tentar de novo
+            campos, itens = _ler_nfe_incremental(_limpar_xml_nfe(xml_content))
+
+        # Valor total
+        valor_total = float(campos['vNF']) if campos.get('vNF') else 0.0
+
+        # Data de emissão
+        if campos.get('dhEmi'):
+            data_str = campos['dhEmi'].replace('Z', '+00:00')
+            try:
+                data_emissao = datetime.fromisoformat(data_str)
+            except:
+                data_emissao = datetime.now()
+        else:
+            data_emissao = datetime.now()
+
+        # Nome do fornecedor (nome fantasia, se houver)
+        if campos.get('xFant'):
+            nome_fornecedor = campos['xFant']
+        elif campos.get('xNome'):
+            nome_fornecedor = campos['xNome']
+        else:
+            nome_fornecedor = "Fornecedor"
+
+        # Número da nota
+        numero_nf = campos.get('nNF') or ""
+
+        # Criar descrição
+        descricao = f"Compra {nome_fornecedor}"
+        if numero_nf:
+            descricao += f" - NF {numero_nf}"
+
+        # Adicionar lista de itens na descrição
+        if itens:
+            descricao += "\n\nItens comprados:"
+            for i, item in enumerate(itens, 1):
+                descricao += f"\n{i}. {item['nome']} - {item['quantidade']:.0f} un - R$ {item['valor_total']:.2f}"
+
+        return {
+            "valor_total": valor_total,
+            "data": data_emissao,
+            "descricao": descricao,
+            "fornecedor": nome_fornecedor,
+            "numero_nf": numero_nf,
+            "chave_acesso": _extrair_chave_acesso(campos),
+            "itens": itens,
+            "sucesso": True,
+            "mensagem": f"XML lido com sucesso! {len(itens)} produtos encontrados.",
+            "tipo_documento": "NF-e"
+        }
+    except ET.ParseError as e:
+        return _resultado_erro(f"Erro ao processar XML: Formato inválido. {str(e)}")
+    except Exception as e:
+        return _resultado_erro(f"Erro ao ler XML: {str(e)}")
+
+# ==================== NFC-e EM HTML ====================
+# Padrões da página de consulta da NFC-e (formato SEFAZ-ES), compilados uma vez.
+# Cada item é uma sequência de spans txtTit -> Rqtd -> RvlUnit -> "Vl. Total" -> valor;
+# um único regex reconhece qualquer um desses pedaços e a página é percorrida
+# uma só vez, sem os ".*?" entre eles (que voltavam atrás em páginas grandes).
+_REGEX_TOKENS_NFCE = re.compile(
+    r'<span class="txtTit">(?P<nome>[^<]+)</span>'
+    r'|<span class="Rqtd">\s*<strong>Qtde\.?:\s*</strong>\s*(?P<quantidade>\d+(?:,\d+)?)\s*</span>'
+    r'|<span class="RvlUnit">\s*<strong>Vl\.\s*Unit\.?:\s*</strong>\s*(?P<valor_unitario>[\d,]+)\s*</span>'
+    r'|(?P<rotulo_total>Vl\.\s*Total)'
+    r'|<span class="valor">(?P<valor_total>[\d,]+)</span>',
+    re.IGNORECASE
+)
+_ROTULO_VALOR_PAGAR_NFCE = 'Valor a pagar R$'
+_REGEX_VALOR_PAGAR_NFCE = re.compile(r'<span class="totalNumb txtMax">(\d+,\d+)</span>')
+_REGEX_FORNECEDOR_NFCE = re.compile(r'<div id="u20" class="txtTopo">(.*?)</div>')
+_REGEX_EMISSAO_NFCE = re.compile(r'<strong>Emissão: </strong>(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2})')
+_REGEX_NUMERO_NFCE = re.compile(r'<strong>Número: </strong>(\d+)')
+
+def _itens_html_nfce(html_content):
+    """Percorre a página uma vez montando os itens (nome, qtde, valor unitário, valor total)"""
+    itens = []
+    atual = None
+    for token in _REGEX_TOKENS_NFCE.finditer(html_content):
+        tipo = token.lastgroup
+        if tipo == 'nome':
+            # Um item novo começa em cada txtTit
+            atual = {'nome': token.group('nome')}
+        elif atual is None:
+            continue
+        elif tipo == 'quantidade':
+            if 'quantidade' not in atual:
+                atual['quantidade'] = token.group('quantidade')
+        elif tipo == 'valor_unitario':
+            if 'quantidade' in atual and 'valor_unitario' not in atual:
+                atual['valor_unitario'] = token.group('valor_unitario')
+        elif tipo == 'rotulo_total':
+            if 'valor_unitario' in atual:
+                atual['rotulo_total'] = True
+        elif 'rotulo_total' in atual:
+            atual['valor_total'] = token.group('valor_total')
+            itens.append(atual)
+            atual = None
+    return itens
+
+def extrair_dados_html_nfce(html_content):
+    """Extrai dados do HTML do DANFE quando o XML não está disponível"""
+    try:
+        if isinstance(html_content, bytes):
+            try:
+                html_content = html_content.decode('utf-8')
+            except:
+                html_content = html_content.decode('latin-1')
+        
+        # Extrair valor a pagar (primeiro total depois do rótulo)
+        valor_total = 0.0
+        inicio_valor = html_content.find(_ROTULO_VALOR_PAGAR_NFCE)
+        if inicio_valor >= 0:
+            match_valor = _REGEX_VALOR_PAGAR_NFCE.search(html_content, inicio_valor + len(_ROTULO_VALOR_PAGAR_NFCE))
+            if match_valor:
+                valor_total = float(match_valor.group(1).replace(',', '.'))
+        
+        # Extrair nome do fornecedor
+        match_fornecedor = _REGEX_FORNECEDOR_NFCE.search(html_content)
+        nome_fornecedor = match_fornecedor.group(1).strip() if match_fornecedor else "Fornecedor"
+        
+        # Extrair data e número da nota
+        match_data = _REGEX_EMISSAO_NFCE.search(html_content)
+        match_numero = _REGEX_NUMERO_NFCE.search(html_content)
+        
+        data_emissao = datetime.now()
+        if match_data:
+            try:
+                data_emissao = datetime.strptime(match_data.group(1), '%d/%m/%Y %H:%M:%S')
+            except:
+                pass
+        
+        numero_nf = match_numero.group(1) if match_numero else ""
+        
+        # Extrair itens - formato específico SEFAZ-ES
+        itens = []
+        for item in _itens_html_nfce(html_content):
+            nome_prod = item['nome'].strip()
+            qtd = float(item['quantidade'].replace(',', '.'))
+            valor_unit = float(item['valor_unitario'].replace(',', '.'))
+            valor_item = float(item['valor_total'].replace(',', '.'))
+            
+            # Verificar se o cálculo bate: quantidade × valor_unitário ≈ valor_total
+            # Se não bater, pode ser que a quantidade esteja em formato diferente
+            calc_esperado = qtd * valor_unit
+            diferenca = abs(calc_esperado - valor_item)
+            
+            # Se a diferença for muito grande (mais de 10%), tentar corrigir
+            if diferenca > (valor_item * 0.1):
+                # Tentar recalcular a quantidade baseado no valor total
+                if valor_unit > 0:
+                    qtd_corrigida = valor_item / valor_unit
+                    # Verificar se faz sentido (ex: 0.025 virou 0.250)
+                    if abs(qtd_corrigida - qtd) > 0.01:
+                        qtd = qtd_corrigida
+            
+            itens.append({
+                'produto': nome_prod,
+                'quantidade': qtd,
+                'valor_unitario': valor_unit,
+                'valor_total': valor_item
+            })
+        
+        # Criar descrição
+        linhas_descricao = [f"Compra {nome_fornecedor}" + (f" - NF {numero_nf}" if numero_nf else "")]
+        
+        # Adicionar lista de itens na descrição
+        if itens:
+            linhas_descricao.append("\nItens comprados:")
+            for i, item in enumerate(itens, 1):
+                linhas_descricao.append(f"{i}. {item['produto']} - {item['quantidade']:.4f} un - R$ {item['valor_total']:.2f}")
+        
+        return {
+            "valor_total": valor_total,
+            "data": data_emissao,
+            "descricao": "\n".join(linhas_descricao),
+            "itens": itens,
+            "sucesso": True,
+            "mensagem": "Dados extraídos do HTML do cupom com sucesso!"
+        }
+    except Exception as e:
+        return {
+            "valor_total": 0.0,
+            "data": datetime.now(),
+            "descricao": "",
+            "itens": [],
+            "sucesso": False,
+            "mensagem": f"Erro ao extrair dados do HTML: {str(e)}"
+        }
+
+# ==================== LEITURA EM LOTE ====================
+def _ler_arquivo_nfe(fonte):
+    """Lê uma NF-e a partir de um caminho ou de um par (nome, conteúdo). Roda nos processos do pool"""
+    if isinstance(fonte, tuple):
+        nome, conteudo = fonte
+    else:
+        nome, conteudo = Path(fonte).name, Path(fonte).read_bytes()
+    
+    dados = extrair_dados_xml_nfe(conteudo)
+    if dados['sucesso'] and not dados['chave_acesso']:
+        # Nota sem Id no infNFe nem protocolo - usar a chave do nome do arquivo, se houver
+        dados['chave_acesso'] = chave_acesso_do_nome_arquivo(nome)
+    return nome, dados
+
+def ler_nfes_em_lote(fontes, processos=None):
+    """Lê várias NF-es em paralelo com um pool de processos.
+    
+    fontes: caminhos de arquivo e/ou pares (nome, conteúdo em bytes).
+    Retorna uma lista de (nome, dados), na mesma ordem das fontes.
+    """
+    fontes = list(fontes)
+    if len(fontes) < MINIMO_ARQUIVOS_PARALELO or processos == 1:
+        return [_ler_arquivo_nfe(fonte) for fonte in fontes]
+    
+    processos = processos or os.cpu_count() or 1
+    # Lotes maiores por processo diminuem o custo de enviar e receber cada nota
+    tamanho_lote = max(1, len(fontes) // (processos * 4))
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        return list(executor.map(_ler_arquivo_nfe, fontes, chunksize=tamanho_lote))
+
+def ler_pasta_nfes(pasta, processos=None):
+    """Lê todos os XMLs de uma pasta (ex: "Notas de Compras/") em paralelo"""
+    arquivos = sorted(Path(pasta).glob("*.xml"), key=lambda caminho: caminho.name)
+    return ler_nfes_em_lote([str(caminho) for caminho in arquivos], processos)
+
+def deduplicar_nfes(resultados):
+    """Separa as notas lidas em (únicas, repetidas), comparando a chave de acesso.
+    
+    Notas sem chave de acesso não são consideradas repetidas.
+    """
+    vistas = set()
+    unicas, repetidas = [], []
+    for nome, dados in resultados:
+        chave = dados.get("chave_acesso")
+        if chave and chave in vistas:
+            repetidas.append((nome, dados))
+            continue
+        if chave:
+            vistas.add(chave)
+        unicas.append((nome, dados))
+    return unicas, repetidas
@@ -0,0 +1,498 @@
+"""
+Leitura de cupons fiscais a partir de fotos (aba "📸 Escanear Cupom").
+
+Antes do envio a foto é preparada (rotação pelo EXIF, tons de cinza, recorte do
+papel, redução e compressão) para não subir fotos de vários MB da câmera.
+A leitura é feita por um dos motores de BACKENDS_OCR: o Google Gemini (online),
+que devolve os dados do cupom em JSON, ou o Tesseract (offline, opcional), cujo
+texto é interpretado por interpretar_texto_cupom no mesmo formato.
+Os resultados ficam num cache em disco (SQLite), indexado pelo hash do conteúdo
+da imagem: reenviar a mesma foto não gasta outra chamada à API.
+Vários cupons podem ser lidos de uma vez (ler_cupons_em_lote), com um limite de
+chamadas simultâneas e novas tentativas quando a API pede para esperar.
+"""
+import base64
+import hashlib
+import importlib.util
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+import requests
+from PIL import Image, ImageFilter, ImageOps
+
+# Prompt enviado ao Gemini - o JSON pedido aqui é o formato de dados_cupom_ia no app
+PROMPT_CUPOM = """
+Analise esta imagem de cupom fiscal e extraia as seguintes informações em formato JSON:
+
+{
+  "data": "DD/MM/AAAA",
+  "fornecedor": "Nome do estabelecimento",
+  "valor_total": 999.99,
+  "itens": [
+    {
+      "nome": "Nome do produto",
+      "quantidade": 1.0,
+      "valor_unitario": 99.99,
+      "valor_total": 99.99
+    }
+  ]
+}
+
+IMPORTANTE:
+- Extraia TODOS os produtos do cupom
+- Valores em formato numérico (use ponto decimal)
+- Data no formato DD/MM/AAAA
+- Se houver desconto, calcule o valor unitário já com desconto
+- Retorne APENAS o JSON, sem texto adicional
+"""
+
+URL_GEMINI = "https://generativelanguage.googleapis.com/v1beta/models/gemini-flash-latest:generateContent"
+
+# Tempo máximo de espera pela resposta do Gemini (segundos)
+TIMEOUT_GEMINI = 60
+
+# Novas tentativas quando a API está sobrecarregada (429) ou com erro no servidor (5xx)
+TENTATIVAS_GEMINI = 4
+ESPERA_INICIAL_GEMINI = 1.0       # segundos; dobra a cada tentativa
+ESPERA_MAXIMA_GEMINI = 30.0
+CODIGOS_REPETIR_GEMINI = {429, 500, 502, 503, 504}
+
+# Cupons enviados ao mesmo tempo na leitura em lote
+LEITURAS_SIMULTANEAS = 4
+
+# Idioma do Tesseract (requer o pacote de idioma "por" instalado)
+IDIOMA_TESSERACT = "por"
+
+# Cache de resultados em disco
+CAMINHO_CACHE_OCR = Path(__file__).parent / ".cache" / "ocr_cupons.sqlite3"
+LIMITE_CACHE_OCR_BYTES = 20 * 1024 * 1024
+
+# Preparo da imagem antes do envio
+LADO_MAXIMO_CUPOM = 1600          # maior lado em pixels (texto do cupom continua legível)
+FORMATO_ENVIO_CUPOM = "JPEG"      # "JPEG" ou "WEBP"
+QUALIDADE_ENVIO_CUPOM = 80
+MIME_POR_FORMATO = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+LADO_ANALISE_RECORTE = 256        # tamanho da miniatura usada para achar o papel
+MARGEM_RECORTE = 0.02             # folga em volta do papel (fração do lado)
+AREA_MINIMA_RECORTE = 0.15        # abaixo disso o recorte é descartado (provável erro)
+
+_trava_cache = threading.Lock()
+
+# ==================== GEMINI ====================
+def interpretar_resposta_json(texto):
+    """Converte a resposta do modelo em dict, removendo blocos de código markdown"""
+    texto = re.sub(r'```json\n?', '', texto)
+    texto = re.sub(r'```\n?', '', texto)
+    return json.loads(texto.strip())
+
+def _espera_gemini(tentativa: int, retry_after=None):
+    """Tempo de espera antes da próxima tentativa (backoff exponencial com variação aleatória)"""
+    if retry_after:
+        try:
+            return min(float(retry_after), ESPERA_MAXIMA_GEMINI)
+        except ValueError:
+            pass
+    espera = min(ESPERA_INICIAL_GEMINI * 2 ** tentativa, ESPERA_MAXIMA_GEMINI)
+    return espera * random.uniform(0.5, 1.0)
+
+def chamar_gemini_cupom(imagem: bytes, api_key: str, timeout: float = TIMEOUT_GEMINI, mime_type: str = "image/jpeg"):
+    """Envia a imagem ao Gemini e retorna os dados do cupom no formato de PROMPT_CUPOM"""
+    payload = {
+        "contents": [{
+            "parts": [
+                {"text": PROMPT_CUPOM},
+                {
+                    "inline_data": {
+                        "mime_type": mime_type,
+                        "data": base64.b64encode(imagem).decode('utf-8')
+                    }
+                }
+            ]
+        }]
+    }
+
+    for tentativa in range(TENTATIVAS_GEMINI):
+        ultima = tentativa == TENTATIVAS_GEMINI - 1
+        try:
+            response = requests.post(URL_GEMINI, params={"key": api_key}, json=payload, timeout=timeout)
+        except (requests.Timeout, requests.ConnectionError):
+            if ultima:
+                raise
+            time.sleep(_espera_gemini(tentativa))
+            continue
+
+        if response.status_code in CODIGOS_REPETIR_GEMINI and not ultima:
+            time.sleep(_espera_gemini(tentativa, response.headers.get("Retry-After")))
+            continue
+        response.raise_for_status()
+        break
+
+    result = response.json()
+    return interpretar_resposta_json(result['candidates'][0]['content']['parts'][0]['text'])
+
+# ==================== PREPARO DA IMAGEM ====================
+def _caixa_do_papel(imagem_cinza):
+    """Retorna a caixa (esq, topo, dir, base) do cupom na foto, ou None se não der para achar.
+
+    O cupom é papel claro sobre um fundo normalmente mais escuro: a análise é feita
+    numa miniatura, separando os pixels mais claros que a média da foto.
+    """
+    miniatura = imagem_cinza.copy()
+    miniatura.thumbnail((LADO_ANALISE_RECORTE, LADO_ANALISE_RECORTE))
+
+    histograma = miniatura.histogram()
+    total_pixels = sum(histograma)
+    media = sum(valor * qtd for valor, qtd in enumerate(histograma)) / total_pixels
+
+    mascara = miniatura.point(lambda v: 255 if v > media else 0).filter(ImageFilter.MedianFilter(5))
+    caixa = mascara.getbbox()
+    if caixa is None:
+        return None
+
+    largura_min, altura_min = miniatura.size
+    esq, topo, dir_, base = caixa
+    if (dir_ - esq) * (base - topo) < AREA_MINIMA_RECORTE * largura_min * altura_min:
+        return None
+
+    # Voltar para a escala da foto original, com uma pequena margem
+    escala_x = imagem_cinza.width / largura_min
+    escala_y = imagem_cinza.height / altura_min
+    margem_x = int(imagem_cinza.width * MARGEM_RECORTE)
+    margem_y = int(imagem_cinza.height * MARGEM_RECORTE)
+    return (
+        max(0, int(esq * escala_x) - margem_x),
+        max(0, int(topo * escala_y) - margem_y),
+        min(imagem_cinza.width, int(dir_ * escala_x) + margem_x),
+        min(imagem_cinza.height, int(base * escala_y) + margem_y),
+    )
+
+def preparar_imagem_cupom(conteudo: bytes, lado_maximo: int = LADO_MAXIMO_CUPOM,
+                          formato: str = FORMATO_ENVIO_CUPOM, qualidade: int = QUALIDADE_ENVIO_CUPOM,
+                          recortar: bool = True):
+    """Prepara a foto do cupom para envio: rotação EXIF, cinza, recorte, redução e compressão.
+
+    Retorna (bytes_da_imagem, mime_type, relatorio).
+    """
+    imagem = Image.open(BytesIO(conteudo))
+    tamanho_original = imagem.size
+
+    # Fotos de celular vêm "deitadas" com a orientação só no EXIF
+    imagem = ImageOps.exif_transpose(imagem)
+    imagem = imagem.convert("L")
+
+    recortada = False
+    if recortar:
+        caixa = _caixa_do_papel(imagem)
+        if caixa is not None and caixa != (0, 0, imagem.width, imagem.height):
+            imagem = imagem.crop(caixa)
+            recortada = True
+
+    imagem.thumbnail((lado_maximo, lado_maximo), Image.LANCZOS)
+
+    buffered = BytesIO()
+    if formato == "WEBP":
+        imagem.save(buffered, format="WEBP", quality=qualidade, method=4)
+    else:
+        imagem.save(buffered, format="JPEG", quality=qualidade, optimize=True)
+    enviado = buffered.getvalue()
+
+    relatorio = {
+        'bytes_original': len(conteudo),
+        'bytes_enviados': len(enviado),
+        'dimensoes_original': tamanho_original,
+        'dimensoes_enviadas': imagem.size,
+        'recortada': recortada,
+        'formato': formato,
+    }
+    return enviado, MIME_POR_FORMATO[formato], relatorio
+
+# ==================== TEXTO DO CUPOM ====================
+_REGEX_DATA_CUPOM = re.compile(r'\b(\d{2})[/.-](\d{2})[/.-](\d{4}|\d{2})\b')
+# Quantificadores limitados: linhas com longas sequências de dígitos não degradam a busca
+_REGEX_NUMERO_CUPOM = r'\d{1,3}(?:\.\d{3}){0,3},\d{2,3}|\d{1,9}(?:[.,]\d{1,6})?'
+# "... 2 UN X 25,90 51,80" - quantidade, unidade opcional, valor unitário e total no fim da linha
+_REGEX_ITEM_CUPOM = re.compile(
+    r'(?P<quantidade>' + _REGEX_NUMERO_CUPOM + r')\s*(?:[A-Za-z]{1,3}\s*)?[xX*]\s*'
+    r'(?P<valor_unitario>' + _REGEX_NUMERO_CUPOM + r')\s+'
+    r'(?P<valor_total>' + _REGEX_NUMERO_CUPOM + r')\s*[A-Z]?\s*$'
+)
+# Número do item e código de barras/produto no começo da descrição
+_REGEX_PREFIXO_ITEM = re.compile(r'^\s*(?:\d{1,3}\s+)?(?:\d{4,14}\s+)?')
+_REGEX_TOTAL_CUPOM = re.compile(
+    r'^\s*(?P<rotulo>VALOR\s+A\s+PAGAR|VALOR\s+TOTAL|TOTAL)\b[^\d]*(?P<valor>' + _REGEX_NUMERO_CUPOM + r')',
+    re.IGNORECASE
+)
+_REGEX_LINHA_CABECALHO = re.compile(
+    r'CNPJ|CPF|\bI\.?E\.?\b|INSCRI|ENDERE|\bRUA\b|\bAV\.|DOCUMENTO|NOTA FISCAL|NFC-?E|CUPOM|EXTRATO|CONSUMIDOR|^\W*$',
+    re.IGNORECASE
+)
+
+def _numero_cupom(texto: str):
+    """Converte números do cupom ("1.234,56", "25,90" ou "25.90") em float"""
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    return float(texto)
+
+def interpretar_texto_cupom(texto: str):
+    """Interpreta o texto de um cupom (saída de OCR) no mesmo formato JSON pedido ao Gemini.
+
+    Reconhece itens no padrão "descrição qtd UN x valor_unitário valor_total" (a descrição
+    pode estar na linha anterior), a data de emissão, o fornecedor (primeira linha do
+    cabeçalho que não é CNPJ/endereço) e o total ("VALOR A PAGAR" > "VALOR TOTAL" > "TOTAL").
+    """
+    linhas = [linha.strip() for linha in texto.splitlines()]
+    linhas = [linha for linha in linhas if linha]
+
+    fornecedor = ""
+    data = ""
+    itens = []
+    totais = {}
+    descricao_pendente = ""
+
+    for linha in linhas:
+        if not data:
+            encontrada = _REGEX_DATA_CUPOM.search(linha)
+            if encontrada:
+                dia, mes, ano = encontrada.groups()
+                if len(ano) == 2:
+                    ano = "20" + ano
+                data = f"{dia}/{mes}/{ano}"
+
+        total = _REGEX_TOTAL_CUPOM.match(linha)
+        if total:
+            rotulo = re.sub(r'\s+', ' ', total.group('rotulo').upper())
+            totais.setdefault(rotulo, _numero_cupom(total.group('valor')))
+            descricao_pendente = ""
+            continue
+
+        item = _REGEX_ITEM_CUPOM.search(linha)
+        if item:
+            descricao = _REGEX_PREFIXO_ITEM.sub('', linha[:item.start()]).strip() or descricao_pendente
+            descricao_pendente = ""
+            if descricao:
+                itens.append({
+                    "nome": descricao,
+                    "quantidade": _numero_cupom(item.group('quantidade')),
+                    "valor_unitario": _numero_cupom(item.group('valor_unitario')),
+                    "valor_total": _numero_cupom(item.group('valor_total'))
+                })
+            continue
+
+        if not itens and not fornecedor and re.search(r'[A-Za-z]{3}', linha) and not _REGEX_LINHA_CABECALHO.search(linha):
+            fornecedor = linha
+            continue
+
+        descricao_pendente = _REGEX_PREFIXO_ITEM.sub('', linha).strip()
+
+    for rotulo in ("VALOR A PAGAR", "VALOR TOTAL", "TOTAL"):
+        if rotulo in totais:
+            valor_total = totais[rotulo]
+            break
+    else:
+        valor_total = round(sum(item['valor_total'] for item in itens), 2)
+
+    return {
+        "data": data,
+        "fornecedor": fornecedor,
+        "valor_total": valor_total,
+        "itens": itens
+    }
+
+# ==================== MOTORES DE OCR ====================
+def _ler_com_gemini(imagem: bytes, mime_type: str, api_key):
+    if not api_key:
+        raise ValueError("API Key do Gemini não configurada")
+    return chamar_gemini_cupom(imagem, api_key, mime_type=mime_type)
+
+def _ler_com_tesseract(imagem: bytes, mime_type: str, api_key):
+    try:
+        import pytesseract
+    except ImportError:
+        raise RuntimeError("Leitura offline indisponível: instale o pytesseract e o Tesseract OCR")
+    texto = pytesseract.image_to_string(Image.open(BytesIO(imagem)), lang=IDIOMA_TESSERACT, config="--psm 6")
+    return interpretar_texto_cupom(texto)
+
+# Motores disponíveis: nome -> função(imagem_preparada, mime_type, api_key) que retorna os dados do cupom
+BACKENDS_OCR = {
+    "gemini": _ler_com_gemini,
+    "tesseract": _ler_com_tesseract,
+}
+NOMES_BACKENDS_OCR = {
+    "gemini": "🤖 Google Gemini (online)",
+    "tesseract": "💻 Tesseract (offline)",
+}
+BACKEND_OCR_PADRAO = "gemini"
+
+def backends_ocr_disponiveis():
+    """Motores que podem ser usados neste ambiente (o Tesseract depende do pytesseract)"""
+    disponiveis = ["gemini"]
+    if importlib.util.find_spec("pytesseract") is not None:
+        disponiveis.append("tesseract")
+    return disponiveis
+
+# ==================== CACHE EM DISCO ====================
+def hash_imagem(conteudo: bytes):
+    """Hash do conteúdo do arquivo enviado (mesma foto -> mesma chave de cache)"""
+    return hashlib.sha256(conteudo).hexdigest()
+
+def abrir_cache_ocr(caminho=CAMINHO_CACHE_OCR):
+    """Abre (criando se preciso) o banco SQLite do cache de OCR"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    conexao = sqlite3.connect(str(caminho), check_same_thread=False)
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS cupons (
+            chave TEXT PRIMARY KEY,
+            dados TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            acessado_em REAL NOT NULL
+        )
+    """)
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_cupons_acessado_em ON cupons(acessado_em)")
+    conexao.commit()
+    return conexao
+
+def buscar_no_cache_ocr(conexao, chave: str):
+    """Retorna os dados guardados para a chave (ou None) e marca o acesso para o LRU"""
+    with _trava_cache:
+        linha = conexao.execute("SELECT dados FROM cupons WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return None
+        conexao.execute("UPDATE cupons SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+        conexao.commit()
+    return json.loads(linha[0])
+
+def salvar_no_cache_ocr(conexao, chave: str, dados: dict, limite_bytes: int = LIMITE_CACHE_OCR_BYTES):
+    """Guarda o resultado e remove os menos usados recentemente até caber no limite"""
+    texto = json.dumps(dados, ensure_ascii=False)
+    with _trava_cache:
+        conexao.execute(
+            "INSERT OR REPLACE INTO cupons (chave, dados, tamanho, acessado_em) VALUES (?, ?, ?, ?)",
+            (chave, texto, len(texto.encode('utf-8')), time.time())
+        )
+        total = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM cupons").fetchone()[0]
+        if total > limite_bytes:
+            for chave_antiga, tamanho in conexao.execute(
+                "SELECT chave, tamanho FROM cupons WHERE chave != ? ORDER BY acessado_em", (chave,)
+            ).fetchall():
+                conexao.execute("DELETE FROM cupons WHERE chave = ?", (chave_antiga,))
+                total -= tamanho
+                if total <= limite_bytes:
+                    break
+        conexao.commit()
+
+# ==================== LEITURA DO CUPOM ====================
+def ler_cupom_imagem(conteudo: bytes, api_key: str = None, conexao_cache=None, backend: str = BACKEND_OCR_PADRAO):
+    """Lê o cupom de uma imagem enviada (bytes do arquivo) com o motor escolhido, usando o cache se informado.
+
+    Retorna (dados, relatorio) - o relatório traz o motor, se veio do cache, a economia
+    de bytes do preparo da imagem e os tempos de cada etapa (em segundos).
+    """
+    ler = BACKENDS_OCR[backend]
+    inicio = time.perf_counter()
+    relatorio = {'backend': backend, 'veio_do_cache': False, 'bytes_original': len(conteudo)}
+
+    # Motores diferentes podem ler a mesma foto de formas diferentes
+    chave = f"{backend}:{hash_imagem(conteudo)}"
+    if conexao_cache is not None:
+        dados = buscar_no_cache_ocr(conexao_cache, chave)
+        if dados is not None:
+            relatorio['veio_do_cache'] = True
+            relatorio['tempo_total'] = time.perf_counter() - inicio
+            return dados, relatorio
+
+    imagem, mime_type, relatorio_preparo = preparar_imagem_cupom(conteudo)
+    relatorio.update(relatorio_preparo)
+    relatorio['tempo_preparo'] = time.perf_counter() - inicio
+
+    inicio_leitura = time.perf_counter()
+    dados = ler(imagem, mime_type, api_key)
+    relatorio['tempo_leitura'] = time.perf_counter() - inicio_leitura
+
+    if conexao_cache is not None:
+        salvar_no_cache_ocr(conexao_cache, chave, dados)
+    relatorio['tempo_total'] = time.perf_counter() - inicio
+    return dados, relatorio
+
+def formatar_bytes(qtd: int):
+    """Tamanho legível (B, KB, MB)"""
+    if qtd < 1024:
+        return f"{qtd} B"
+    if qtd < 1024 * 1024:
+        return f"{qtd / 1024:.0f} KB"
+    return f"{qtd / (1024 * 1024):.1f} MB"
+
+def resumir_relatorio_cupom(relatorio: dict):
+    """Texto curto com a economia de bytes e a latência de uma leitura"""
+    if relatorio.get('veio_do_cache'):
+        return f"♻️ Recuperado do cache em {relatorio['tempo_total'] * 1000:.0f} ms, sem nova leitura"
+
+    original = relatorio['bytes_original']
+    enviados = relatorio['bytes_enviados']
+    economia = (1 - enviados / original) * 100 if original else 0.0
+    largura, altura = relatorio['dimensoes_enviadas']
+    return (
+        f"📉 Imagem: {formatar_bytes(original)} → {formatar_bytes(enviados)} ({economia:.0f}% menor, "
+        f"{largura}x{altura}{', recortada' if relatorio['recortada'] else ''}) · "
+        f"⏱️ preparo {relatorio['tempo_preparo']:.2f}s + leitura {relatorio['tempo_leitura']:.2f}s = "
+        f"{relatorio['tempo_total']:.2f}s"
+    )
+
+# ==================== LEITURA EM LOTE ====================
+def ler_cupons_em_lote(arquivos, api_key: str = None, conexao_cache=None,
+                       max_simultaneas: int = LEITURAS_SIMULTANEAS, ao_concluir=None,
+                       backend: str = BACKEND_OCR_PADRAO):
+    """Lê vários cupons [(nome, bytes)] em paralelo, com no máximo max_simultaneas chamadas ao mesmo tempo.
+
+    ao_concluir(concluidos, total) é chamado na thread de quem chamou a função a cada
+    cupom terminado (ex: para atualizar uma barra de progresso).
+    Retorna [(nome, dados, relatorio, erro)] na ordem recebida; erro é None quando deu certo.
+    """
+    arquivos = list(arquivos)
+    resultados = [None] * len(arquivos)
+    if not arquivos:
+        return resultados
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_simultaneas, len(arquivos)))) as executor:
+        futuros = {
+            executor.submit(ler_cupom_imagem, conteudo, api_key, conexao_cache, backend): i
+            for i, (_, conteudo) in enumerate(arquivos)
+        }
+        for concluidos, futuro in enumerate(as_completed(futuros), 1):
+            i = futuros[futuro]
+            nome = arquivos[i][0]
+            try:
+                dados, relatorio = futuro.result()
+                resultados[i] = (nome, dados, relatorio, None)
+            except Exception as e:
+                resultados[i] = (nome, None, None, str(e))
+            if ao_concluir is not None:
+                ao_concluir(concluidos, len(arquivos))
+
+    return resultados
+
+def converter_cupom_em_compra(dados: dict):
+    """Converte os dados lidos de um cupom no formato de compra usado por inserir_compras_em_lote"""
+    try:
+        data = datetime.strptime(dados.get('data') or '', '%d/%m/%Y')
+    except ValueError:
+        data = datetime.now()
+
+    itens = dados.get('itens') or []
+    valor_total = float(dados.get('valor_total') or sum(float(item.get('valor_total', 0)) for item in itens))
+    return {
+        "data": data,
+        "valor_total": valor_total,
+        "fornecedor": dados.get('fornecedor', ''),
+        "itens": itens,
+        "chave_acesso": "",
+        "tipo_documento": "Cupom Fiscal"
+    }
@@ -0,0 +1,308 @@
+"""
+Caixa de saída (write-behind) para vendas, custos de entrega e custos automáticos das box.
+
+O lançamento é gravado primeiro num diário local, só de acréscimo
+(dados/outbox.jsonl, com fsync), e confirmado na hora para quem está no balcão.
+Uma thread em segundo plano envia os pendentes ao Supabase em lotes. Cada
+lançamento leva uma chave de idempotência (UUID, coluna chave_idempotencia):
+se um envio falhar no meio e for repetido, o Supabase ignora o que já recebeu.
+Lançamentos pendentes sobrevivem a quedas de internet e a reinícios do app.
+
+Cada tabela é enviada separadamente: uma falha em vendas não segura as entregas.
+Só falhas de conexão (timeout, 5xx) ficam para a próxima tentativa. Um lançamento
+que o banco recusa de vez (restrição violada, valor inválido, erro 4xx) sai da
+fila e vai para a lista de rejeitados, que fica no diário e aparece no menu lateral.
+
+Um lançamento pode levar linhas dependentes (ex: a compra do custo automático e
+as parcelas dela): elas são gravadas depois da linha principal, com o id dela.
+
+Requer adicionar_chave_idempotencia.sql no Supabase (sem a coluna, os envios
+funcionam, mas sem a proteção contra duplicados).
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+CAMINHO_OUTBOX = Path(__file__).parent / "dados" / "outbox.jsonl"
+
+# Lançamentos enviados por requisição
+TAMANHO_LOTE_ENVIO = 100
+
+# Espera entre verificações da fila e limite da espera após falhas (segundos)
+INTERVALO_ENVIO = 5
+ESPERA_MAXIMA_ENVIO = 120
+
+# Acima desta quantidade de linhas o diário é reescrito só com os pendentes e rejeitados
+LINHAS_MAXIMAS_DIARIO = 2000
+
+COLUNA_IDEMPOTENCIA = "chave_idempotencia"
+
+# Classes de SQLSTATE do Postgres que não mudam tentando de novo:
+# 22 = dado inválido, 23 = restrição violada, 42 = coluna/tabela inexistente ou sem permissão
+_CLASSES_SQLSTATE_DEFINITIVAS = ("22", "23", "42")
+
+def erro_definitivo(erro: Exception):
+    """True se o banco recusou o dado (reenviar não adianta); False para falhas de conexão/servidor"""
+    if isinstance(erro, (sqlite3.IntegrityError, sqlite3.DataError)):
+        # Banco local (banco_local.py)
+        return True
+    if isinstance(erro, sqlite3.OperationalError):
+        # Coluna inexistente é definitiva; banco travado/ocupado passa
+        return "column" in str(erro)
+    codigo = str(getattr(erro, "code", "") or "")
+    if codigo[:2] in _CLASSES_SQLSTATE_DEFINITIVAS or codigo.startswith("PGRST1") or codigo.startswith("PGRST2"):
+        # Erros do PostgREST: PGRST1xx = requisição inválida, PGRST2xx = esquema (coluna/tabela/relação)
+        return True
+    resposta = getattr(erro, "response", None)
+    status = getattr(erro, "status_code", None) or getattr(resposta, "status_code", None)
+    if isinstance(status, int):
+        # 408 (timeout) e 429 (limite de requisições) passam com o tempo
+        return 400 <= status < 500 and status not in (408, 429)
+    return False
+
+class CaixaDeSaida:
+    """Fila durável de inserts pendentes, com envio em lote ao Supabase"""
+
+    def __init__(self, caminho=CAMINHO_OUTBOX):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._trava = threading.Lock()
+        self._trava_envio = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+        self.ultimo_erro = None
+        self._pendentes, self._rejeitados, self._linhas_diario = self._ler_diario()
+
+    # ---------- diário ----------
+    def _ler_diario(self):
+        """Reconstrói a fila a partir do diário: lançamentos sem confirmação continuam pendentes"""
+        pendentes = {}
+        rejeitados = {}
+        linhas = 0
+        if not self.caminho.exists():
+            return pendentes, rejeitados, linhas
+        with open(self.caminho, encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                linhas += 1
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    # Última linha cortada por uma queda no meio da gravação
+                    continue
+                if "confirmados" in registro:
+                    for chave in registro["confirmados"]:
+                        pendentes.pop(chave, None)
+                elif "rejeitado" in registro:
+                    rejeitado = registro["rejeitado"]
+                    pendentes.pop(rejeitado["chave"], None)
+                    rejeitados[rejeitado["chave"]] = rejeitado
+                elif "descartados" in registro:
+                    for chave in registro["descartados"]:
+                        rejeitados.pop(chave, None)
+                else:
+                    pendentes[registro["chave"]] = registro
+        return pendentes, rejeitados, linhas
+
+    def _acrescentar(self, registro: dict):
+        with open(self.caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        self._linhas_diario += 1
+
+    def _compactar(self):
+        """Reescreve o diário só com os pendentes e os rejeitados (troca atômica do arquivo)"""
+        temporario = self.caminho.with_suffix(".tmp")
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            for registro in self._pendentes.values():
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            for rejeitado in self._rejeitados.values():
+                arquivo.write(json.dumps({"rejeitado": rejeitado}, ensure_ascii=False) + "\n")
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho)
+        self._linhas_diario = len(self._pendentes) + len(self._rejeitados)
+
+    def _compactar_se_preciso(self):
+        if not self._pendentes or self._linhas_diario > LINHAS_MAXIMAS_DIARIO:
+            self._compactar()
+
+    # ---------- fila ----------
+    def enfileirar(self, tabela: str, dados: dict, dependentes: dict = None):
+        """Grava o insert no diário e retorna a chave de idempotência (o envio acontece depois).
+
+        dependentes: {"tabela": ..., "coluna": ..., "linhas": [...]} - linhas gravadas depois da
+        principal, com o id dela na coluna indicada (ex: parcelas de uma compra em compra_id).
+        """
+        registro = {
+            "chave": str(uuid.uuid4()),
+            "tabela": tabela,
+            "dados": dados,
+            "criado_em": datetime.now().isoformat()
+        }
+        if dependentes:
+            registro["dependentes"] = dependentes
+        with self._trava:
+            self._acrescentar(registro)
+            self._pendentes[registro["chave"]] = registro
+        self._acordar.set()
+        return registro["chave"]
+
+    def pendentes(self):
+        """Lista dos lançamentos ainda não enviados, na ordem em que foram feitos"""
+        with self._trava:
+            return list(self._pendentes.values())
+
+    def rejeitados(self):
+        """Lançamentos recusados pelo banco (com o motivo em "erro"), na ordem em que foram recusados"""
+        with self._trava:
+            return list(self._rejeitados.values())
+
+    def descartar_rejeitado(self, chave: str):
+        """Tira um lançamento da lista de rejeitados (depois de lançado de novo ou conferido)"""
+        with self._trava:
+            if self._rejeitados.pop(chave, None) is not None:
+                self._acrescentar({"descartados": [chave]})
+                self._compactar_se_preciso()
+
+    def _confirmar(self, chaves: list):
+        with self._trava:
+            self._acrescentar({"confirmados": chaves})
+            for chave in chaves:
+                self._pendentes.pop(chave, None)
+            self._compactar_se_preciso()
+
+    def _rejeitar(self, registro: dict, erro: Exception):
+        rejeitado = dict(registro, erro=str(erro), rejeitado_em=datetime.now().isoformat())
+        with self._trava:
+            self._acrescentar({"rejeitado": rejeitado})
+            self._pendentes.pop(registro["chave"], None)
+            self._rejeitados[registro["chave"]] = rejeitado
+            self._compactar_se_preciso()
+
+    # ---------- envio ----------
+    def _enviar_lote(self, supabase, tabela: str, registros: list):
+        linhas = [dict(registro["dados"], **{COLUNA_IDEMPOTENCIA: registro["chave"]}) for registro in registros]
+        try:
+            supabase.table(tabela).upsert(linhas, on_conflict=COLUNA_IDEMPOTENCIA, ignore_duplicates=True).execute()
+        except Exception as e:
+            if COLUNA_IDEMPOTENCIA not in str(e):
+                raise
+            # Coluna ainda não criada no banco: enviar sem a chave
+            supabase.table(tabela).insert([registro["dados"] for registro in registros]).execute()
+
+    def _enviar_com_dependentes(self, supabase, registro: dict):
+        """Grava a linha principal e depois as dependentes (se ainda não foram gravadas numa tentativa anterior)"""
+        tabela = registro["tabela"]
+        linha = dict(registro["dados"], **{COLUNA_IDEMPOTENCIA: registro["chave"]})
+        try:
+            gravadas = supabase.table(tabela).upsert([linha], on_conflict=COLUNA_IDEMPOTENCIA, ignore_duplicates=True).execute().data
+            if not gravadas:
+                # Já recebida numa tentativa anterior
+                gravadas = supabase.table(tabela).select("id").eq(COLUNA_IDEMPOTENCIA, registro["chave"]).execute().data
+        except Exception as e:
+            if COLUNA_IDEMPOTENCIA not in str(e):
+                raise
+            gravadas = supabase.table(tabela).insert(registro["dados"]).execute().data
+        principal_id = gravadas[0]["id"]
+
+        dependentes = registro["dependentes"]
+        ja_gravadas = supabase.table(dependentes["tabela"]).select("id").eq(dependentes["coluna"], principal_id).limit(1).execute().data
+        if dependentes["linhas"] and not ja_gravadas:
+            linhas = [dict(linha, **{dependentes["coluna"]: principal_id}) for linha in dependentes["linhas"]]
+            supabase.table(dependentes["tabela"]).insert(linhas).execute()
+
+    def _enviar_registros(self, supabase, registros: list):
+        """Envia um lote; se o banco recusar, tenta linha a linha e separa as recusadas"""
+        if any(registro.get("dependentes") for registro in registros):
+            # Linhas dependentes precisam do id da principal: um lançamento por vez
+            lotes = [[registro] for registro in registros]
+        else:
+            lotes = [registros]
+
+        for lote in lotes:
+            try:
+                if lote[0].get("dependentes"):
+                    self._enviar_com_dependentes(supabase, lote[0])
+                else:
+                    self._enviar_lote(supabase, lote[0]["tabela"], lote)
+                self._confirmar([registro["chave"] for registro in lote])
+            except Exception as e:
+                if not erro_definitivo(e):
+                    raise
+                if len(lote) == 1:
+                    self._rejeitar(lote[0], e)
+                    continue
+                # Achar o(s) lançamento(s) recusado(s): os outros do lote seguem
+                for registro in lote:
+                    try:
+                        self._enviar_lote(supabase, registro["tabela"], [registro])
+                        self._confirmar([registro["chave"]])
+                    except Exception as erro_linha:
+                        if not erro_definitivo(erro_linha):
+                            raise
+                        self._rejeitar(registro, erro_linha)
+
+    def enviar(self, supabase, tamanho_lote: int = TAMANHO_LOTE_ENVIO):
+        """Envia os pendentes em lotes, cada tabela de forma independente. Retorna as tabelas que receberam dados.
+
+        Lançamentos recusados pelo banco vão para os rejeitados. Se alguma tabela ficar sem
+        conexão, as outras são enviadas mesmo assim e a primeira falha é propagada no final.
+        """
+        with self._trava_envio:
+            por_tabela = {}
+            for registro in self.pendentes():
+                por_tabela.setdefault(registro["tabela"], []).append(registro)
+
+            enviadas = []
+            falha = None
+            for tabela, registros in por_tabela.items():
+                try:
+                    for inicio in range(0, len(registros), tamanho_lote):
+                        self._enviar_registros(supabase, registros[inicio:inicio + tamanho_lote])
+                except Exception as e:
+                    falha = falha or e
+                enviadas.append(tabela)
+                for registro in registros:
+                    if registro.get("dependentes") and registro["dependentes"]["tabela"] not in enviadas:
+                        enviadas.append(registro["dependentes"]["tabela"])
+            if falha is not None:
+                raise falha
+            return enviadas
+
+    def iniciar_envio_em_segundo_plano(self, supabase, ao_enviar=None):
+        """Inicia (uma vez) a thread que envia os pendentes; ao_enviar(tabelas) é chamado após cada envio"""
+        if self._thread is not None:
+            return
+
+        def laco():
+            espera = INTERVALO_ENVIO
+            while True:
+                self._acordar.wait(espera)
+                self._acordar.clear()
+                if not self.pendentes():
+                    continue
+                tabelas = sorted({registro["tabela"] for registro in self.pendentes()})
+                try:
+                    enviadas = self.enviar(supabase)
+                    self.ultimo_erro = None
+                    espera = INTERVALO_ENVIO
+                except Exception as e:
+                    # Sem conexão: tentar de novo esperando cada vez mais
+                    enviadas = tabelas
+                    self.ultimo_erro = str(e)
+                    espera = min(espera * 2, ESPERA_MAXIMA_ENVIO)
+                if enviadas and ao_enviar is not None:
+                    ao_enviar(enviadas)
+
+        self._thread = threading.Thread(target=laco, name="envio-outbox", daemon=True)
+        self._thread.start()
+        self._acordar.set()
+
+    def acordar(self):
+        """Pede à thread de envio uma tentativa imediata"""
+        self._acordar.set()
@@ -0,0 +1,251 @@
+"""
+Réplica local (SQLite) das tabelas singelo_* com sincronização incremental a partir do Supabase.
+
+Usada quando BACKEND_DADOS = "replica" (ver app.py). O ClienteReplica tem a mesma
+interface do cliente do Supabase:
+- leituras (select) são respondidas pela réplica local, depois de trazer do Supabase
+  só as linhas novas/alteradas desde a última sincronização (marca d'água em
+  updated_at, ou created_at se a tabela ainda não tiver a coluna);
+- escritas (insert/upsert/update/delete e rpc) vão direto para o Supabase, e as linhas
+  devolvidas já são aplicadas na réplica;
+- exclusões feitas fora do app são detectadas comparando os ids de tempos em tempos;
+- sem conexão com o Supabase, as leituras respondem com a cópia local (o erro fica em
+  ultimo_erro e a sincronização é tentada de novo a cada INTERVALO_SINCRONIZACAO).
+
+Para que alterações (ex: parcela marcada como paga em outro aparelho) sejam vistas,
+rode adicionar_updated_at.sql no Supabase.
+"""
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from banco_local import ClienteLocal, tabelas_da_consulta
+from outbox import erro_definitivo
+
+CAMINHO_REPLICA = Path(__file__).parent / "dados" / "replica_supabase.sqlite3"
+
+# Intervalo mínimo entre duas consultas de sincronização da mesma tabela (segundos)
+INTERVALO_SINCRONIZACAO = 30
+
+# Intervalo entre as conferências de ids (detecta linhas apagadas no Supabase por outros aparelhos)
+INTERVALO_RECONCILIACAO = 10 * 60
+
+# Linhas trazidas por requisição na sincronização
+TAMANHO_PAGINA_SINCRONIZACAO = 1000
+
+# Folga na marca d'água: pega também linhas gravadas por transações que terminaram depois
+FOLGA_MARCA_DAGUA = timedelta(seconds=5)
+
+# Funções do banco que só leem dados: na réplica o app calcula com as consultas diretas
+RPCS_SOMENTE_LEITURA = {"singelo_resumo_financeiro"}
+
+_ESQUEMA_SINCRONIZACAO = """
+CREATE TABLE IF NOT EXISTS _sincronizacao (
+    tabela TEXT PRIMARY KEY,
+    coluna TEXT NOT NULL,
+    marca_dagua TEXT,
+    reconciliado_em REAL NOT NULL DEFAULT 0
+);
+"""
+
+_REGEX_FRACAO_SEGUNDOS = re.compile(r'\.(\d+)')
+
+def _ler_data(texto: str):
+    """Lê os timestamps do Postgres ("2025-03-12T10:22:31.12345+00:00", "...Z")"""
+    texto = texto.replace("Z", "+00:00")
+    # Versões antigas do fromisoformat só aceitam 3 ou 6 casas nos segundos
+    texto = _REGEX_FRACAO_SEGUNDOS.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), texto, count=1)
+    return datetime.fromisoformat(texto)
+
+class _RpcIndisponivel:
+    def __init__(self, funcao: str):
+        self._funcao = funcao
+
+    def execute(self):
+        # Mesma mensagem do PostgREST para função inexistente: o app usa as consultas diretas
+        raise Exception(f"Could not find the function public.{self._funcao} in the schema cache (PGRST202)")
+
+class _RpcRemoto:
+    def __init__(self, replica, chamada):
+        self._replica = replica
+        self._chamada = chamada
+
+    def execute(self):
+        resultado = self._chamada.execute()
+        # A função pode ter gravado em qualquer tabela: sincronizar tudo na próxima leitura
+        self._replica.marcar_desatualizada()
+        return resultado
+
+class ConsultaReplica:
+    """Guarda a cadeia de chamadas (select/eq/order...) e decide no execute() onde rodá-la"""
+
+    def __init__(self, replica, tabela: str):
+        self._replica = replica
+        self._tabela = tabela
+        self._operacao = "select"
+        self._colunas = "*"
+        self._chamadas = []
+
+    def __getattr__(self, metodo):
+        if metodo.startswith("_"):
+            raise AttributeError(metodo)
+
+        def registrar(*args, **kwargs):
+            if metodo in ("select", "insert", "upsert", "update", "delete"):
+                self._operacao = metodo
+                if metodo == "select":
+                    self._colunas = args[0] if args else kwargs.get("colunas", "*")
+            self._chamadas.append((metodo, args, kwargs))
+            return self
+        return registrar
+
+    def _montar(self, cliente):
+        consulta = cliente.table(self._tabela)
+        for metodo, args, kwargs in self._chamadas:
+            consulta = getattr(consulta, metodo)(*args, **kwargs)
+        return consulta
+
+    def execute(self):
+        replica = self._replica
+        if self._operacao == "select":
+            for tabela in dict.fromkeys(tabelas_da_consulta(self._tabela, self._colunas)):
+                replica.sincronizar(tabela)
+            return self._montar(replica.local).execute()
+
+        # Escrita: vale o que o Supabase gravou; a réplica recebe as linhas devolvidas
+        resultado = self._montar(replica.remoto).execute()
+        if self._operacao == "delete":
+            replica.local.apagar_linhas(self._tabela, [linha["id"] for linha in resultado.data or []])
+            # Exclusões em cascata no Supabase: conferir as outras tabelas na próxima leitura
+            replica.marcar_desatualizada(reconciliar=True)
+        else:
+            replica.local.gravar_linhas(self._tabela, resultado.data or [])
+        return resultado
+
+class ClienteReplica:
+    """Cliente com a interface do supabase.Client: lê da réplica local e escreve no Supabase"""
+
+    def __init__(self, remoto, caminho=CAMINHO_REPLICA):
+        self.remoto = remoto
+        self.local = ClienteLocal(caminho, chaves_estrangeiras=False)
+        # Estado da sincronização no mesmo arquivo, numa conexão separada
+        self._estado_conexao = sqlite3.connect(str(caminho), check_same_thread=False)
+        self._estado_conexao.executescript(_ESQUEMA_SINCRONIZACAO)
+        self._trava = threading.Lock()
+        self._sincronizado_em = {}
+        # Falha de conexão da última sincronização (None = sincronizada)
+        self.ultimo_erro = None
+
+    def table(self, nome: str):
+        return ConsultaReplica(self, nome)
+
+    def from_(self, nome: str):
+        return self.table(nome)
+
+    def rpc(self, funcao: str, parametros: dict = None):
+        if funcao in RPCS_SOMENTE_LEITURA:
+            return _RpcIndisponivel(funcao)
+        return _RpcRemoto(self, self.remoto.rpc(funcao, parametros))
+
+    def marcar_desatualizada(self, reconciliar: bool = False):
+        """Força a sincronização de todas as tabelas na próxima leitura"""
+        with self._trava:
+            self._sincronizado_em.clear()
+            if reconciliar:
+                self._estado_conexao.execute("UPDATE _sincronizacao SET reconciliado_em = 0")
+                self._estado_conexao.commit()
+
+    # ---------- sincronização ----------
+    def _estado(self, tabela: str):
+        linha = self._estado_conexao.execute(
+            "SELECT coluna, marca_dagua, reconciliado_em FROM _sincronizacao WHERE tabela = ?", (tabela,)
+        ).fetchone()
+        if linha is None:
+            return "updated_at", None, 0.0
+        return linha
+
+    def _salvar_estado(self, tabela: str, coluna: str, marca_dagua, reconciliado_em: float):
+        self._estado_conexao.execute(
+            "INSERT OR REPLACE INTO _sincronizacao (tabela, coluna, marca_dagua, reconciliado_em) VALUES (?, ?, ?, ?)",
+            (tabela, coluna, marca_dagua, reconciliado_em)
+        )
+        self._estado_conexao.commit()
+
+    def _buscar_alteradas(self, tabela: str, coluna: str, marca_dagua):
+        """Traz do Supabase, em páginas, as linhas com coluna >= marca d'água (menos a folga)"""
+        desde = None
+        if marca_dagua:
+            desde = (_ler_data(marca_dagua) - FOLGA_MARCA_DAGUA).isoformat()
+
+        linhas = []
+        while True:
+            consulta = self.remoto.table(tabela).select("*")
+            if desde:
+                consulta = consulta.gte(coluna, desde)
+            inicio = len(linhas)
+            pagina = consulta.order(coluna).order("id").range(inicio, inicio + TAMANHO_PAGINA_SINCRONIZACAO - 1).execute().data
+            linhas.extend(pagina)
+            if len(pagina) < TAMANHO_PAGINA_SINCRONIZACAO:
+                return linhas
+
+    def _ids_remotos(self, tabela: str):
+        ids = set()
+        while True:
+            inicio = len(ids)
+            pagina = self.remoto.table(tabela).select("id").order("id").range(inicio, inicio + TAMANHO_PAGINA_SINCRONIZACAO - 1).execute().data
+            ids.update(linha["id"] for linha in pagina)
+            if len(pagina) < TAMANHO_PAGINA_SINCRONIZACAO:
+                return ids
+
+    def sincronizar(self, tabela: str, forcar: bool = False):
+        """Traz do Supabase o que mudou na tabela desde a última sincronização.
+
+        Sem conexão (timeout, DNS, 5xx) a réplica fica como está e a próxima tentativa
+        espera INTERVALO_SINCRONIZACAO; erros de consulta (4xx) são propagados.
+        """
+        with self._trava:
+            agora = time.monotonic()
+            if not forcar and agora - self._sincronizado_em.get(tabela, float("-inf")) < INTERVALO_SINCRONIZACAO:
+                return
+            try:
+                self._sincronizar(tabela)
+            except Exception as e:
+                if erro_definitivo(e):
+                    raise
+                self.ultimo_erro = str(e)
+            else:
+                self.ultimo_erro = None
+            self._sincronizado_em[tabela] = agora
+
+    def _sincronizar(self, tabela: str):
+        coluna_anterior, marca_dagua, reconciliado_em = self._estado(tabela)
+
+        # updated_at é testado a cada sincronização: depois de adicionar_updated_at.sql,
+        # a primeira busca por ele é completa e traz as alterações que o created_at não via
+        try:
+            coluna = "updated_at"
+            linhas = self._buscar_alteradas(tabela, coluna, marca_dagua if coluna_anterior == coluna else None)
+        except Exception as e:
+            if "updated_at" not in str(e):
+                raise
+            # Tabela ainda sem updated_at no Supabase: só linhas novas são detectadas
+            coluna = "created_at"
+            linhas = self._buscar_alteradas(tabela, coluna, marca_dagua if coluna_anterior == coluna else None)
+        if coluna != coluna_anterior:
+            marca_dagua = None
+
+        self.local.gravar_linhas(tabela, linhas)
+        marcas = [linha[coluna] for linha in linhas if linha.get(coluna)]
+        if marcas:
+            marca_dagua = max([marca_dagua] + marcas if marca_dagua else marcas, key=_ler_data)
+
+        if time.time() - reconciliado_em >= INTERVALO_RECONCILIACAO:
+            apagadas = self.local.ids(tabela) - self._ids_remotos(tabela)
+            if apagadas:
+                self.local.apagar_linhas(tabela, apagadas)
+            reconciliado_em = time.time()
+
+        self._salvar_estado(tabela, coluna, marca_dagua, reconciliado_em)